@@ -0,0 +1,180 @@
+import argparse
+import json
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from curriculum_index import build_curriculum_index, load_dataset
+
+# Maximum number of distinct responses kept in memory
+RESPONSE_CACHE_SIZE = 4096
+
+# Maximum number of results returned by a search
+SEARCH_LIMIT = 50
+
+# How long clients may reuse a response before revalidating it with its ETag
+CACHE_MAX_AGE = 300
+
+
+class NotFound(Exception):
+    pass
+
+
+def _search_disciplines(index, query, department=None):
+    # Case-insensitive search on the discipline code and name
+    query = query.strip().upper()
+    results = []
+    for code, discipline in index['disciplines'].items():
+        if department and department not in discipline['departments']:
+            continue
+        if query in code or query in (discipline['name'] or ''):
+            results.append({'code': code, 'name': discipline['name'], 'url': discipline['url']})
+            if len(results) >= SEARCH_LIMIT:
+                break
+    return results
+
+
+def route(index, path, query):
+    """Return the JSON document for a request path and its query parameters."""
+    # Keys may contain '/' (e.g. 'FICÇÃO / NÃO FICÇÃO' programmes), so only the first segment names the resource
+    resource, _, key = path.strip('/').partition('/')
+    resource = unquote(resource)
+    key = unquote(key) or None
+    if not resource:
+        return {
+            'version': index['version'],
+            'endpoints': [
+                '/disciplines?q=<text>&department=<department>', '/disciplines/<code>',
+                '/departments', '/departments/<department>',
+                '/programmes?type=<MsC|CE|μC>', '/programmes/<programme>',
+                '/overlaps', '/overlaps/<department>',
+                '/ce-in-msc?ce=<CE>&msc=<MsC>'
+            ]
+        }
+
+    if resource == 'version':
+        return {'version': index['version']}
+
+    if resource == 'disciplines':
+        if key is None:
+            return _search_disciplines(index, query.get('q', ''), query.get('department', '').upper() or None)
+        if key in index['disciplines']:
+            return index['disciplines'][key]
+
+    elif resource == 'departments':
+        if key is None:
+            return sorted(index['departments'])
+        if key.upper() in index['departments']:
+            return index['departments'][key.upper()]
+
+    elif resource == 'programmes':
+        if key is None:
+            program_type = query.get('type')
+            return [
+                {field: programme[field] for field in ['programme', 'code', 'name', 'type', 'departments']}
+                for programme in index['programmes'].values()
+                if program_type is None or programme['type'] == program_type
+            ]
+        if key in index['programmes']:
+            return index['programmes'][key]
+
+    elif resource == 'overlaps':
+        if key is None:
+            return index['overlaps']
+        if key.upper() in index['departments']:
+            return index['departments'][key.upper()]['overlaps']
+
+    elif resource == 'ce-in-msc':
+        if key is None:
+            return [
+                result for result in index['ce_in_msc']
+                if ('ce' not in query or result['CE'] == query['ce']) and ('msc' not in query or result['MsC'] == query['msc'])
+            ]
+
+    raise NotFound(path)
+
+
+def _etag_matches(if_none_match, etag):
+    # If-None-Match holds '*' or a comma-separated list of (possibly weak, W/"...") ETags
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+
+
+def make_handler(index, verbose=False):
+    """Create the request handler class serving the given index."""
+    etag = f'"{index["version"]}"'
+
+    # Responses only depend on the path and the dataset version, so they are cached (bounded)
+    @lru_cache(maxsize=RESPONSE_CACHE_SIZE)
+    def render(path, query_string):
+        query = {name: values[0] for name, values in parse_qs(query_string).items()}
+        try:
+            document = route(index, path, query)
+            status = 200
+        except NotFound:
+            document = {'error': f"Not found: {path}"}
+            status = 404
+        return status, json.dumps(document, ensure_ascii=False).encode('utf-8')
+
+    class CurriculumRequestHandler(BaseHTTPRequestHandler):
+        # Keep connections alive between requests, and send small responses without waiting for ACKs
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+
+            # Unknown paths are still answered with 404, so the request is routed before the ETag is checked
+            status, body = render(url.path, url.query)
+
+            # The dataset is read-only, so the version is a valid validator for every resource
+            if status == 200 and _etag_matches(self.headers.get('If-None-Match'), etag):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if status == 200:
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', f"public, max-age={CACHE_MAX_AGE}")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            if verbose:
+                super().log_message(format, *args)
+
+    return CurriculumRequestHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only JSON API over the curriculum data produced by main.py.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    # Build the whole index before accepting requests
+    uc_data, ce_in_msc = load_dataset()
+    index = build_curriculum_index(uc_data, ce_in_msc)
+    print(f"Loaded dataset version {index['version']}: {len(index['disciplines'])} disciplines, "
+          f"{len(index['programmes'])} programmes, {len(index['departments'])} departments")
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(index, args.verbose))
+    print(f"Serving the curriculum API on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
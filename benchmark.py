@@ -0,0 +1,159 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from dpuc_loader import load_dpuc_urls
+from main import build_uc_data, check_ce_in_msc, load_ce_files, load_master_curricular_plans, load_microcredentials
+from msc_branch_processing import process_branch_files
+from snapshots import save_snapshot
+from synthetic_data import generate_curriculum_data
+
+# Folder containing the pipeline scripts and the dashboard
+REPO_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+# A stage is only reported as a regression if it is slower by both this ratio and this many seconds
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_SECONDS = 0.05
+
+# Number of departments and disciplines selected when timing dashboard reruns
+DASHBOARD_SELECTIONS = 5
+
+
+def _timed(timings, name, func, *args, **kwargs):
+    # Run one stage with its output silenced and record its duration
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args, **kwargs)
+    timings[name] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _median(values):
+    return round(float(pd.Series(values).median()), 4) if values else None
+
+
+def benchmark_dashboard(timings):
+    # Time the dashboard with Streamlit's headless app tester (the data files are read from the current folder)
+    from streamlit.testing.v1 import AppTest
+
+    if REPO_FOLDER not in sys.path:
+        sys.path.insert(0, REPO_FOLDER)
+
+    app = AppTest.from_file(os.path.join(REPO_FOLDER, 'showdata.py'), default_timeout=600)
+    _timed(timings, 'dashboard_first_run', app.run)
+
+    # Reruns triggered by selecting departments and disciplines
+    for label_start, name in [('Select a Department', 'dashboard_department_rerun'), ('Search or Select a Discipline', 'dashboard_discipline_rerun')]:
+        durations = []
+        selectbox = next(box for box in app.selectbox if box.label.startswith(label_start))
+        for option in selectbox.options[1:DASHBOARD_SELECTIONS + 1]:
+            rerun_timings = {}
+            selectbox = next(box for box in app.selectbox if box.label.startswith(label_start))
+            _timed(rerun_timings, name, selectbox.select(option).run)
+            durations.append(rerun_timings[name])
+        timings[name] = _median(durations)
+
+    if app.exception:
+        raise RuntimeError(f"Dashboard failed during the benchmark: {app.exception[0].message}")
+
+
+def run_benchmark(scale=1, seed=0, dashboard=True):
+    """Generate a synthetic dataset of the given scale, run every pipeline stage on it and return the timings."""
+    timings = {}
+    current_folder = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix='ua_benchmark_') as work_folder:
+        summary = _timed(timings, 'generate_synthetic_data', generate_curriculum_data, work_folder, scale, seed)
+
+        # The pipeline uses paths relative to the repository root
+        os.chdir(work_folder)
+        try:
+            _timed(timings, 'branch_processing', process_branch_files, 'data/MSC')
+            ce_data = _timed(timings, 'load_ce', load_ce_files, 'data/CE')
+            msc_data = _timed(timings, 'load_msc', load_master_curricular_plans, 'data/MSC')
+            microcredential_data = _timed(timings, 'load_microcredentials', load_microcredentials, 'data/Microcredenciais.xlsx')
+            link_info = _timed(timings, 'load_dpuc_cold', load_dpuc_urls, 'DPUCs - contents + objectives.xlsx')
+            _timed(timings, 'load_dpuc_cached', load_dpuc_urls, 'DPUCs - contents + objectives.xlsx')
+            uc_data, _ = _timed(timings, 'build_uc_data', build_uc_data, msc_data, ce_data, microcredential_data, link_info)
+            _timed(timings, 'write_uc_all', uc_data.to_excel, 'UC_all.xlsx', index=False)
+            _timed(timings, 'save_snapshot', save_snapshot, uc_data)
+            ce_in_msc = _timed(timings, 'check_ce_in_msc', check_ce_in_msc, uc_data)
+            ce_in_msc.to_excel('CE_in_MsC.xlsx', index=False)
+
+            if dashboard:
+                benchmark_dashboard(timings)
+        finally:
+            os.chdir(current_folder)
+
+    summary['uc_rows'] = len(uc_data)
+    return {
+        'scale': scale,
+        'seed': seed,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dataset': summary,
+        'stages': timings
+    }
+
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare benchmark results with a baseline (matched by scale) and return the stages that got slower."""
+    baseline_by_scale = {entry['scale']: entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        reference = baseline_by_scale.get(entry['scale'])
+        if reference is None:
+            continue
+        for stage, seconds in entry['stages'].items():
+            previous = reference['stages'].get(stage)
+            if previous is None or seconds is None:
+                continue
+            if seconds > previous * (1 + tolerance) and seconds - previous > MIN_REGRESSION_SECONDS:
+                regressions.append({'scale': entry['scale'], 'stage': stage, 'baseline': previous, 'current': seconds})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the curriculum pipeline and dashboard on synthetic data.")
+    parser.add_argument('--scale', type=float, action='append', help="dataset scale (repeatable, default 1)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-dashboard', action='store_true', help="skip the dashboard timings")
+    parser.add_argument('--output', default='benchmark_results.json', help="where to write the JSON results")
+    parser.add_argument('--baseline', help="JSON results of a previous run to compare with")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown ratio per stage")
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scale or [1]:
+        print(f"Running benchmark at scale {scale}x...")
+        entry = run_benchmark(scale, args.seed, dashboard=not args.no_dashboard)
+        for stage, seconds in entry['stages'].items():
+            print(f"  {stage:<30} {seconds}s")
+        results.append(entry)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nBenchmark results saved to '{args.output}'")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION at {regression['scale']}x: {regression['stage']} took {regression['current']}s (baseline {regression['baseline']}s)")
+        if regressions:
+            sys.exit(1)
+        print("No performance regressions found.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import hashlib
+
+import pandas as pd
+
+from deduplication import FINGERPRINT_COLUMN, add_fingerprints
+from overlap_engine import PROGRAM_TYPES, membership_masks, overlap_table
+
+# Files produced by main.py
+UC_FILE = 'UC_all.xlsx'
+CE_IN_MSC_FILE = 'CE_in_MsC.xlsx'
+
+
+def load_dataset(uc_file=UC_FILE, ce_in_msc_file=CE_IN_MSC_FILE):
+    """Load the UC data and the CE in MsC results produced by main.py."""
+    uc_data = pd.read_excel(uc_file)
+    if FINGERPRINT_COLUMN not in uc_data.columns:
+        uc_data = add_fingerprints(uc_data)
+    uc_data['CODDISCIPLINACOD'] = uc_data['CODDISCIPLINACOD'].astype(str)
+
+    ce_in_msc = pd.read_excel(ce_in_msc_file)
+    return uc_data, ce_in_msc
+
+
+def dataset_version(uc_data, ce_in_msc):
+    # The version changes whenever a row of the UC data or of the CE in MsC results changes
+    digest = hashlib.sha256()
+    digest.update('\n'.join(sorted(uc_data[FINGERPRINT_COLUMN])).encode('utf-8'))
+    digest.update(ce_in_msc.to_csv(index=False).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _clean(value):
+    # Empty cells become None so that they can be serialised as JSON null
+    return None if pd.isna(value) else value
+
+
+def _split_programme(programme):
+    # Programmes are stored as "<code>_<name>"
+    parts = programme.split('_')
+    return {'programme': programme, 'code': parts[0].strip(), 'name': parts[1].strip().upper() if len(parts) > 1 else ''}
+
+
+def overlap_regions(masks):
+    """Group the disciplines by the combination of programme types they belong to (e.g. 'MsC+CE')."""
+    regions = overlap_table(masks)
+    # Only the non-empty regions of at least one programme type are listed
+    regions = regions[(regions['MASK'] > 0) & (regions['COUNT'] > 0)]
+    return dict(zip(regions['REGION'], regions['DISCIPLINES']))
+
+
+def build_curriculum_index(uc_data, ce_in_msc):
+    """Precompute the lookups served by the query API."""
+    uc_data = uc_data.drop_duplicates(subset=FINGERPRINT_COLUMN)
+
+    # ------------------------------- Disciplines ------------------------------- #
+    disciplines = {}
+    first_rows = uc_data.drop_duplicates(subset='CODDISCIPLINACOD').sort_values(by='CODDISCIPLINACOD')
+    discipline_departments = uc_data.groupby('CODDISCIPLINACOD')['DEPARTMENT'].agg(lambda x: sorted(x.dropna().unique().tolist()))
+    for code, name, url in zip(first_rows['CODDISCIPLINACOD'], first_rows['NOMEDISCIPLINA'], first_rows['Url']):
+        disciplines[code] = {
+            'code': code,
+            'name': _clean(name),
+            'url': _clean(url),
+            'departments': discipline_departments[code],
+            'programmes': {program_type: [] for program_type in PROGRAM_TYPES}
+        }
+
+    # One grouping per programme type gives the programmes of every discipline
+    for program_type, column in PROGRAM_TYPES.items():
+        rows = uc_data[uc_data[column].notna()]
+        grouped = rows.groupby(['CODDISCIPLINACOD', column])
+        programme_departments = grouped['DEPARTMENT'].agg(lambda x: sorted(x.dropna().unique().tolist()))
+        programme_branches = grouped['RAMO'].agg(lambda x: sorted(x.dropna().unique().tolist()))
+        for (code, programme), departments in programme_departments.items():
+            entry = _split_programme(programme)
+            entry['departments'] = departments
+            if program_type == 'MsC':
+                entry['branches'] = programme_branches[(code, programme)]
+            disciplines[code]['programmes'][program_type].append(entry)
+
+    # ------------------------------- Programmes ------------------------------- #
+    programmes = {}
+    for program_type, column in PROGRAM_TYPES.items():
+        for programme, rows in uc_data[uc_data[column].notna()].groupby(column):
+            entry = _split_programme(programme)
+            entry['type'] = program_type
+            entry['departments'] = sorted(rows['DEPARTMENT'].dropna().unique().tolist())
+            entry['disciplines'] = sorted(rows['CODDISCIPLINACOD'].unique().tolist())
+            if program_type == 'MsC':
+                entry['branches'] = sorted(rows['RAMO'].dropna().unique().tolist())
+            programmes[programme] = entry
+
+    # ------------------------------- Departments ------------------------------- #
+    # Membership masks of every department and discipline, computed in a single pass
+    department_masks = membership_masks(uc_data, group_column='DEPARTMENT')
+    department_masks = {department: masks.droplevel(0) for department, masks in department_masks.groupby(level=0)}
+
+    departments = {}
+    for department, rows in uc_data.groupby('DEPARTMENT'):
+        departments[department] = {
+            'department': department,
+            'disciplines': sorted(rows['CODDISCIPLINACOD'].unique().tolist()),
+            'programmes': {
+                program_type: sorted(rows[column].dropna().unique().tolist())
+                for program_type, column in PROGRAM_TYPES.items()
+            },
+            'overlaps': overlap_regions(department_masks[department])
+        }
+
+    # ------------------------------- CE in MsC ------------------------------- #
+    ce_in_msc_results = [
+        {'CE': _clean(row['CE']), 'MsC': _clean(row['MsC'])}
+        for _, row in ce_in_msc.iterrows()
+    ]
+
+    return {
+        'version': dataset_version(uc_data, ce_in_msc),
+        'disciplines': disciplines,
+        'programmes': programmes,
+        'departments': departments,
+        'overlaps': overlap_regions(membership_masks(uc_data)),
+        'ce_in_msc': ce_in_msc_results
+    }
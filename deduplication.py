@@ -0,0 +1,100 @@
+import os
+
+import pandas as pd
+
+# Column holding the row fingerprint stored with the dataset
+FINGERPRINT_COLUMN = 'ROWHASH'
+
+# Column holding the file each row was loaded from (only kept until deduplication)
+SOURCE_COLUMN = 'SOURCE'
+
+# Columns of the final dataset, fingerprinted at ingest
+DATASET_COLUMNS = ['CODDISCIPLINACOD', 'NOMEDISCIPLINA', 'DEPARTMENT', 'MSC', 'RAMO', 'CE', 'Microcredencial', 'Url']
+
+# Deduplication policies: 'exact' compares every dataset column, the others only a subset of key columns
+DEDUP_POLICIES = {
+    'exact': DATASET_COLUMNS,
+    # The same discipline in the same programme, whatever the department folder or URL
+    'programme': ['CODDISCIPLINACOD', 'MSC', 'RAMO', 'CE', 'Microcredencial'],
+    # The same discipline offered by the same department
+    'department': ['CODDISCIPLINACOD', 'DEPARTMENT']
+}
+
+
+def row_fingerprints(df, columns=None):
+    """Return a stable 64-bit fingerprint (as 16 hex characters) for every row of the DataFrame."""
+    columns = columns or [col for col in DATASET_COLUMNS if col in df.columns]
+
+    # Hash the values as text, so that the fingerprint does not depend on how a file was read
+    # (e.g. integer or string codes, None or NaN for empty cells)
+    values = df[columns].fillna('').astype(str)
+    hashes = pd.util.hash_pandas_object(values, index=False)
+    return hashes.map('{:016x}'.format)
+
+
+def add_fingerprints(df):
+    # Compute the exact row fingerprint once and store it with the dataset
+    df = df.copy()
+    df[FINGERPRINT_COLUMN] = row_fingerprints(df, [col for col in DATASET_COLUMNS if col in df.columns])
+    return df
+
+
+def _explain(sources, departments):
+    # Describe where a group of duplicated rows came from
+    if len(sources) == 1:
+        if len(departments) > 1:
+            return "Same file listed under several departments"
+        return "Repeated within the same file"
+
+    filenames = {os.path.basename(source) for source in sources}
+    folders = {os.path.dirname(source) for source in sources}
+    if len(filenames) == 1 and len(folders) > 1:
+        return "Same plan under several department folders"
+    return "Same rows in several files"
+
+
+def duplicate_report(df, key):
+    """Return one row per duplicated key explaining which files and departments it came from."""
+    duplicated = df[key.duplicated(keep=False)]
+    if len(duplicated) == 0:
+        return pd.DataFrame(columns=['DEDUPKEY', 'CODDISCIPLINACOD', 'NOMEDISCIPLINA', 'OCCURRENCES', 'DEPARTMENTS', 'SOURCES', 'EXPLANATION'])
+
+    duplicated = duplicated.assign(DEDUPKEY=key[duplicated.index])
+    if SOURCE_COLUMN not in duplicated.columns:
+        duplicated[SOURCE_COLUMN] = ''
+
+    report = duplicated.groupby('DEDUPKEY', sort=False).agg(
+        CODDISCIPLINACOD=('CODDISCIPLINACOD', 'first'),
+        NOMEDISCIPLINA=('NOMEDISCIPLINA', 'first'),
+        OCCURRENCES=('CODDISCIPLINACOD', 'size'),
+        DEPARTMENTS=('DEPARTMENT', lambda x: sorted(set(x.dropna()))),
+        SOURCES=(SOURCE_COLUMN, lambda x: sorted(set(x.dropna())))
+    ).reset_index()
+
+    report['EXPLANATION'] = [_explain(sources, departments) for sources, departments in zip(report['SOURCES'], report['DEPARTMENTS'])]
+    report['DEPARTMENTS'] = report['DEPARTMENTS'].map('/'.join)
+    report['SOURCES'] = report['SOURCES'].map('; '.join)
+
+    return report.sort_values(by=['OCCURRENCES', 'CODDISCIPLINACOD'], ascending=[False, True]).reset_index(drop=True)
+
+
+def deduplicate(df, policy='exact'):
+    """Remove duplicated rows according to the policy and return the deduplicated data and a duplicate report.
+
+    The policy is either the name of one of DEDUP_POLICIES or a list of key columns.
+    """
+    key_columns = DEDUP_POLICIES[policy] if isinstance(policy, str) else list(policy)
+
+    if FINGERPRINT_COLUMN not in df.columns:
+        df = add_fingerprints(df)
+
+    # The exact policy reuses the stored fingerprint, subset policies hash their key columns once
+    if key_columns == DEDUP_POLICIES['exact']:
+        key = df[FINGERPRINT_COLUMN]
+    else:
+        key = row_fingerprints(df, key_columns)
+
+    report = duplicate_report(df, key)
+    deduplicated = df[~key.duplicated(keep='first')]
+
+    return deduplicated, report
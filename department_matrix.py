@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+
+def department_incidence(uc_data):
+    """Return the department x discipline incidence matrix (1 if the department teaches the discipline)."""
+    # scipy is only imported when the matrix is built (at publish time, or for uploaded data), not when the dashboard starts
+    from scipy import sparse
+
+    pairs = uc_data[['DEPARTMENT', 'CODDISCIPLINACOD']].dropna().drop_duplicates()
+    department_ids, departments = pd.factorize(pairs['DEPARTMENT'], sort=True)
+    discipline_ids, codes = pd.factorize(pairs['CODDISCIPLINACOD'], sort=True)
+
+    incidence = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.int32), (department_ids, discipline_ids)),
+        shape=(len(departments), len(codes))
+    )
+    return incidence, list(departments), list(codes)
+
+
+def shared_discipline_tables(uc_data):
+    """Return the number of disciplines shared by every pair of departments, and the shared disciplines themselves.
+
+    The counts come from the incidence matrix product (the diagonal holds the disciplines of each department).
+    Only pairs sharing at least one discipline are listed, in both orders.
+    """
+    incidence, departments, codes = department_incidence(uc_data)
+    shared = (incidence @ incidence.T).tocoo()
+    departments = np.array(departments, dtype=object)
+    pairs = pd.DataFrame({
+        'DEPARTMENT_A': departments[shared.row],
+        'DEPARTMENT_B': departments[shared.col],
+        'SHARED': shared.data.astype(np.int64)
+    }).sort_values(by=['DEPARTMENT_A', 'DEPARTMENT_B']).reset_index(drop=True)
+
+    # Drill-down lists: every discipline taught by two different departments, once per pair (A < B)
+    teaching = uc_data[['DEPARTMENT', 'CODDISCIPLINACOD']].dropna().drop_duplicates()
+    members = teaching.merge(teaching, on='CODDISCIPLINACOD', suffixes=('_A', '_B'))
+    members = members[members['DEPARTMENT_A'] < members['DEPARTMENT_B']]
+    members = members[['DEPARTMENT_A', 'DEPARTMENT_B', 'CODDISCIPLINACOD']]
+    members = members.sort_values(by=['DEPARTMENT_A', 'DEPARTMENT_B', 'CODDISCIPLINACOD']).reset_index(drop=True)
+
+    return pairs, members
+
+
+def shared_matrix(pairs):
+    # Square department x department matrix of shared discipline counts
+    matrix = pairs.pivot(index='DEPARTMENT_A', columns='DEPARTMENT_B', values='SHARED')
+    departments = sorted(set(matrix.index) | set(matrix.columns))
+    return matrix.reindex(index=departments, columns=departments).fillna(0).astype(int)
+
+
+def shared_disciplines(members, department_a, department_b):
+    # Disciplines taught by both departments (members are stored once per pair, in alphabetical order)
+    department_a, department_b = sorted([department_a, department_b])
+    selected = members[(members['DEPARTMENT_A'] == department_a) & (members['DEPARTMENT_B'] == department_b)]
+    return selected['CODDISCIPLINACOD'].tolist()
+
+
+def top_pairs(pairs, count=10):
+    # Pairs of different departments sharing the most disciplines (each pair once)
+    different = pairs[pairs['DEPARTMENT_A'] < pairs['DEPARTMENT_B']]
+    return different.sort_values(by=['SHARED', 'DEPARTMENT_A', 'DEPARTMENT_B'], ascending=[False, True, True]).head(count).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    from curriculum_index import load_dataset
+
+    uc_data, _ = load_dataset()
+    pairs, members = shared_discipline_tables(uc_data)
+    print("Departments sharing the most disciplines:")
+    for _, row in top_pairs(pairs).iterrows():
+        print(f"- {row['DEPARTMENT_A']} and {row['DEPARTMENT_B']}: {row['SHARED']} disciplines")
@@ -0,0 +1,103 @@
+import json
+import os
+
+import pandas as pd
+
+from signatures import file_signature
+
+# Workbook with the DPUC (course unit description) contents and objectives
+DPUC_FILE = 'DPUCs - contents + objectives.xlsx'
+
+# Folder holding the persistent column cache built from the workbook
+DPUC_CACHE_FOLDER = os.path.join('.cache', 'dpuc')
+
+# Column used to join the DPUC data with the UC data
+DPUC_KEY_COLUMN = 'CodigoPACO'
+
+
+def _column_cache_path(column, cache_folder):
+    return os.path.join(cache_folder, f"{column}.parquet")
+
+
+def stream_dpuc_columns(columns, file_path=DPUC_FILE):
+    """Read only the requested columns of the DPUC workbook, one row at a time."""
+    # openpyxl is only imported when the workbook has to be read, not when the dashboard imports this module
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+
+        # Locate the requested columns in the header row
+        header = [str(cell) if cell is not None else '' for cell in next(rows)]
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise KeyError(f"Columns {missing} not found in '{file_path}'")
+        positions = [header.index(column) for column in columns]
+
+        # Keep only the projected values of every non-empty row
+        data = {column: [] for column in columns}
+        for row in rows:
+            if row is None or all(cell is None for cell in row):
+                continue
+            for column, position in zip(columns, positions):
+                data[column].append(row[position] if position < len(row) else None)
+    finally:
+        workbook.close()
+
+    return pd.DataFrame(data, columns=list(columns))
+
+
+def load_dpuc_columns(columns=('Url',), file_path=DPUC_FILE, cache_folder=DPUC_CACHE_FOLDER):
+    """Return the CodigoPACO column plus the requested DPUC columns, in workbook order.
+
+    Every column is cached on disk the first time it is requested and only read again
+    from the workbook when the workbook changes.
+    """
+    columns = [DPUC_KEY_COLUMN] + [column for column in columns if column != DPUC_KEY_COLUMN]
+    os.makedirs(cache_folder, exist_ok=True)
+
+    # Columns cached for the current version of the workbook (none if the workbook changed since they were written)
+    signature = list(file_signature(file_path))
+    signature_path = os.path.join(cache_folder, 'signature.json')
+    cached = {}
+    if os.path.exists(signature_path):
+        with open(signature_path, encoding='utf-8') as f:
+            cached = json.load(f)
+    cached_columns = cached.get('columns', []) if cached.get('signature') == signature else []
+
+    # Stream the columns that are not cached yet (all of them in a single pass over the workbook)
+    missing = [column for column in columns if column not in cached_columns or not os.path.exists(_column_cache_path(column, cache_folder))]
+    if missing:
+        print(f"Loading columns {missing} from '{file_path}'")
+        streamed = stream_dpuc_columns(missing, file_path)
+
+        # Files are replaced atomically, so other processes reading the cache never see a partial file
+        for column in missing:
+            column_path = _column_cache_path(column, cache_folder)
+            streamed[[column]].to_parquet(f"{column_path}.{os.getpid()}.tmp", index=False)
+            os.replace(f"{column_path}.{os.getpid()}.tmp", column_path)
+
+        # The signature is written last, once the columns it lists are in place
+        with open(f"{signature_path}.{os.getpid()}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({'signature': signature, 'columns': sorted(set(cached_columns) | set(missing))}, f)
+        os.replace(f"{signature_path}.{os.getpid()}.tmp", signature_path)
+
+    # Assemble the requested columns from the cache
+    return pd.concat([pd.read_parquet(_column_cache_path(column, cache_folder)) for column in columns], axis=1)
+
+
+def load_dpuc_urls(file_path=DPUC_FILE, cache_folder=DPUC_CACHE_FOLDER):
+    # CodigoPACO -> Url lookup used to add the URL column to the UC data
+    return load_dpuc_columns(['Url'], file_path, cache_folder)
+
+
+def load_dpuc_texts(columns=('Title', 'Objectivos', 'Programa'), file_path=DPUC_FILE, cache_folder=DPUC_CACHE_FOLDER):
+    # CodigoPACO -> title, objectives and contents, for stages that need the DPUC text
+    return load_dpuc_columns(columns, file_path, cache_folder)
+
+
+if __name__ == "__main__":
+    # Build (or refresh) the cache for the URL and text columns
+    dpuc_data = load_dpuc_columns(['Url', 'Title', 'Objectivos', 'Programa'])
+    print(f"{len(dpuc_data)} DPUC rows cached in '{DPUC_CACHE_FOLDER}'")
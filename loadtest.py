@@ -0,0 +1,209 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from profiling import peak_memory_mb
+
+# Folder containing the dashboard
+REPO_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+# Relative weight of the navigation actions performed by a simulated user
+ACTIONS = {
+    'department': 0.5,
+    'discipline': 0.5
+}
+
+# Labels of the selectboxes driven by the simulated users
+SELECTBOX_LABELS = {
+    'department': 'Select a Department',
+    'discipline': 'Search or Select a Discipline'
+}
+
+
+@contextlib.contextmanager
+def _shared_runtime():
+    # AppTest sets up process-wide state (a fake Runtime singleton, the pages cache and the appTest config option)
+    # before every rerun and undoes it afterwards, which races with the sessions running at the same time: set it
+    # up once (like AppTest does) for all the sessions, whose reruns then only touch their own state
+    from unittest.mock import MagicMock
+    from streamlit import source_util
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1.util import patch_config_options
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    saved_runtime = Runtime._instance
+    with source_util._pages_cache_lock:
+        saved_pages = source_util._cached_pages
+        source_util._cached_pages = None
+    Runtime._instance = runtime
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        Runtime._instance = saved_runtime
+        with source_util._pages_cache_lock:
+            source_util._cached_pages = saved_pages
+
+
+def _session_app(script_path):
+    """Return an app tester whose reruns leave the process-wide state set up by _shared_runtime alone."""
+    from urllib import parse
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.testing.v1 import AppTest
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    class SessionAppTest(AppTest):
+        def _run(self, widget_state=None, timeout=None):
+            # Same as AppTest._run without the global setup and teardown (secrets are not used by the dashboard)
+            pages_manager = PagesManager(self._script_path, setup_watcher=False)
+            script_runner = LocalScriptRunner(self._script_path, self.session_state, pages_manager, args=self.args, kwargs=self.kwargs)
+            self._tree = script_runner.run(widget_state, self.query_params, timeout if timeout is not None else self.default_timeout, self._page_hash)
+            self._tree._runner = self
+            # Last event is SHUTDOWN, so the corresponding data includes the query string
+            self.query_params = parse.parse_qs(script_runner.event_data[-1]["client_state"].query_string)
+            return self
+
+    # from_file always builds a plain AppTest
+    return SessionAppTest(script_path, default_timeout=600)
+
+
+def _selectbox(app, action):
+    # None when the widget is missing (e.g. after a failed rerun)
+    return next((box for box in app.selectbox if box.label.startswith(SELECTBOX_LABELS[action])), None)
+
+
+def run_session(session_id, actions_per_session, think_time, seed):
+    """Simulate one user session and return the duration and the errors of every rerun."""
+    rng = random.Random(seed + session_id)
+    reruns = []
+
+    def timed_run(action, run):
+        # Exceptions shown by the app are counted after every rerun, not only the last one
+        start = time.perf_counter()
+        app = run()
+        seconds = time.perf_counter() - start
+        # A rerun that rendered nothing (not even the title or an exception) failed in the tester, not in the dashboard
+        harness_failure = not app.title and not app.exception
+        reruns.append({'action': action, 'seconds': seconds, 'errors': len(app.exception), 'harness_failure': harness_failure})
+        return app
+
+    # First page load
+    app = _session_app(os.path.join(REPO_FOLDER, 'showdata.py'))
+    timed_run('first_load', app.run)
+
+    # Navigate through departments and disciplines like a user would
+    for _ in range(actions_per_session):
+        time.sleep(think_time * rng.random())
+        action = rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+        selectbox = _selectbox(app, action)
+        if selectbox is None:
+            # The session cannot go on: the widget is an error of the dashboard unless the tester failed to render the page
+            if not reruns[-1]['harness_failure']:
+                reruns.append({'action': action, 'seconds': 0.0, 'errors': 1, 'harness_failure': False})
+            break
+        option = rng.choice(selectbox.options)
+        timed_run(action, selectbox.select(option).run)
+
+    return {'session': session_id, 'reruns': reruns}
+
+
+def _percentiles(seconds):
+    series = pd.Series(seconds)
+    percentiles = {f"p{int(q * 100)}": round(float(series.quantile(q)), 4) for q in [0.5, 0.9, 0.95, 0.99]}
+    percentiles['max'] = round(float(series.max()), 4)
+    return percentiles
+
+
+def run_load_test(sessions=10, actions_per_session=20, think_time=0.5, seed=0, data_folder='.'):
+    """Run the simulated sessions concurrently against one dashboard process and summarise the results.
+
+    Every session runs in its own thread, so the sessions share the cached resources, the data and the GIL
+    like the sessions of a single `streamlit run` server.
+    """
+    current_folder = os.getcwd()
+    os.chdir(os.path.abspath(data_folder))
+    if REPO_FOLDER not in sys.path:
+        sys.path.insert(0, REPO_FOLDER)
+
+    # Streamlit is imported before the baseline, so that only the dashboard (its data and libraries) and the sessions count
+    with _shared_runtime():
+        base_memory = peak_memory_mb()
+
+        session_results = []
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=sessions) as executor:
+                futures = [executor.submit(run_session, session_id, actions_per_session, think_time, seed) for session_id in range(sessions)]
+                for session_id, future in enumerate(futures):
+                    try:
+                        session_results.append(future.result())
+                    except Exception as exc:
+                        # A crashed session is reported as an error instead of stopping the other ones
+                        print(f"Session {session_id} failed: {exc!r}")
+                        session_results.append({'session': session_id, 'reruns': [{'action': 'crash', 'seconds': 0.0, 'errors': 1, 'harness_failure': False}]})
+        finally:
+            os.chdir(current_folder)
+    wall_time = time.perf_counter() - start
+    peak_memory = peak_memory_mb()
+
+    reruns = pd.DataFrame([rerun for result in session_results for rerun in result['reruns']])
+    # The time of the reruns the tester failed to render does not say anything about the dashboard
+    timed_reruns = reruns[(reruns['action'] != 'crash') & ~reruns['harness_failure']]
+    memory_growth = round(peak_memory - base_memory, 1) if peak_memory is not None else None
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'sessions': sessions,
+        'actions_per_session': actions_per_session,
+        'think_time': think_time,
+        'wall_time_seconds': round(wall_time, 2),
+        'reruns': len(timed_reruns),
+        'errors': int(reruns['errors'].sum()),
+        'harness_failures': int(reruns['harness_failure'].sum()),
+        'throughput_reruns_per_second': round(len(timed_reruns) / wall_time, 2),
+        'latency_seconds': _percentiles(timed_reruns['seconds']),
+        'latency_seconds_by_action': {action: _percentiles(group['seconds']) for action, group in timed_reruns.groupby('action')},
+        # Growth of the shared process (dashboard data and all the sessions), and that growth averaged over the sessions
+        # (not the memory of any single session)
+        'process_memory_growth_mb': memory_growth,
+        'avg_memory_growth_per_session_mb': round(memory_growth / sessions, 1) if memory_growth is not None else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions and measure rerun latency.")
+    parser.add_argument('--sessions', type=int, default=10, help="number of concurrent sessions")
+    parser.add_argument('--actions', type=int, default=20, help="navigation actions per session")
+    parser.add_argument('--think-time', type=float, default=0.5, help="maximum pause between actions, in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-folder', default='.', help="folder containing UC_all.xlsx and CE_in_MsC.xlsx")
+    parser.add_argument('--output', default='loadtest_results.json', help="where to write the JSON results")
+    args = parser.parse_args()
+
+    print(f"Running {args.sessions} concurrent sessions of {args.actions} actions...")
+    results = run_load_test(args.sessions, args.actions, args.think_time, args.seed, args.data_folder)
+
+    print(f"- {results['reruns']} reruns in {results['wall_time_seconds']}s ({results['throughput_reruns_per_second']} reruns/s, {results['errors']} errors, {results['harness_failures']} reruns not rendered by the tester)")
+    print(f"- Rerun latency: {results['latency_seconds']}")
+    print(f"- Memory: {results['process_memory_growth_mb']} MB for the dashboard process ({results['avg_memory_growth_per_session_mb']} MB of growth per session on average)")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nLoad test results saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,14 @@
 import pandas as pd
 import os
 
+from deduplication import DATASET_COLUMNS, SOURCE_COLUMN, add_fingerprints, deduplicate
+from dpuc_loader import load_dpuc_urls
+from shared_dataset import publish_dataset
+from snapshots import save_snapshot
+
+# Deduplication policy applied to the combined data: 'exact', 'programme', 'department' or a list of key columns
+DEDUP_POLICY = 'exact'
+
 
 def load_master_curricular_plans(base_folder_path):
     # List to hold DataFrames
@@ -55,6 +63,9 @@ def load_master_curricular_plans(base_folder_path):
                         cols = cols[:2] + [cols[-2]] + [cols[-1]] + cols[2:-2]
                         df = df[cols]
 
+                    # Keep track of the file the rows came from (used by the duplicate report)
+                    df[SOURCE_COLUMN] = file_path
+
                     # Append the DataFrame to the list
                     dataframes.append(df)
 
@@ -101,6 +112,9 @@ def load_ce_files(folder_path):
                     cols = cols[:2] + [cols[-1]] + cols[2:-1]  # Adjust position of 'CE' column
                     df_copy = df_copy[cols]
 
+                # Keep track of the file the rows came from (used by the duplicate report)
+                df_copy[SOURCE_COLUMN] = file_path
+
                 # Append the modified DataFrame to the list
                 dataframes.append(df_copy)
 
@@ -140,6 +154,9 @@ def load_microcredentials(file_path):
     print("\nUpdated DataFrame with NOMEDISCIPLINA:")
     print(df.head())
 
+    # Keep track of the file the rows came from (used by the duplicate report)
+    df[SOURCE_COLUMN] = file_path
+
     return df
 
 
@@ -178,11 +195,37 @@ def check_ce_in_msc(uc_data):
     
     return ce_in_msc_df
 
-def main():
-    # ------------------------------- CE processing ------------------------------- #
-    # Specify the folder containing the Excel files
-    folder_path = 'data/CE'  # Make sure the folder path is correct
+def build_uc_data(msc_data, ce_data, microcredential_data, link_info, dedup_policy=DEDUP_POLICY):
+    # Combine the microcredential data with the master and specialization curricular plans
+    uc_data = pd.concat([msc_data, ce_data, microcredential_data], ignore_index=True, sort=False)
+
+    # ------------------------------- Add URL column ------------------------------- #
+    # Merge the UC data with the link info on CODDISCIPLINACOD (UC data) and CodigoPACO (link info)
+    uc_data = pd.merge(uc_data, link_info[['CodigoPACO', 'Url']], left_on='CODDISCIPLINACOD', right_on='CodigoPACO', how='left')
+
+    # Drop the 'CodigoPACO' column after the merge
+    uc_data.drop('CodigoPACO', axis=1, inplace=True)
+
+    # Normalize the 'NOMEDISCIPLINA' column to uppercase
+    uc_data['NOMEDISCIPLINA'] = uc_data['NOMEDISCIPLINA'].str.upper()
+
+    # Normalize the 'DEPARTMENT' column to uppercase
+    uc_data['DEPARTMENT'] = uc_data['DEPARTMENT'].str.upper()
+
+    # Filter out rows that contain "Opção" in the NOMEDISCIPLINA column
+    uc_data = uc_data[~uc_data['NOMEDISCIPLINA'].str.contains("OPÇÃO", na=False)]
+
+    # Keep only the columns you need after the merge (plus the source file until deduplication)
+    uc_data = uc_data[DATASET_COLUMNS + [SOURCE_COLUMN]]
+
+    # Compute the row fingerprints once and remove duplicates based on them
+    uc_data = add_fingerprints(uc_data)
+    uc_data, duplicate_report = deduplicate(uc_data, dedup_policy)
+    uc_data = uc_data.drop(columns=[SOURCE_COLUMN])
 
+    return uc_data, duplicate_report
+
+def process_ce(folder_path='data/CE'):
     # Load Excel files and combine them
     ce_combined_data = load_ce_files(folder_path)
 
@@ -203,9 +246,11 @@ def main():
     ce_combined_data.to_excel(output_file, index=False)
     print(f"\nCombined data saved to '{output_file}'")
 
-    # ------------------------------- Msc processing ------------------------------- #
+    return ce_combined_data
+
+def process_msc(base_folder_path='data/MSC'):
     # Load Master curricular plans and combine them
-    msc_combined_master_data = load_master_curricular_plans("data/MSC")
+    msc_combined_master_data = load_master_curricular_plans(base_folder_path)
 
     # save the combined master data to a new Excel file
     output_master_file = 'MSC_combined.xlsx'
@@ -220,9 +265,10 @@ def main():
     msc_combined_master_data.to_excel(output_master_file, index=False)
     print(f"\nCombined master data saved to '{output_master_file}'")
 
-    # ------------------------------- MicroCred processing ------------------------------- #
+    return msc_combined_master_data
+
+def process_microcredentials(microcredential_file_path='data/Microcredenciais.xlsx'):
     # Load the microcredential data
-    microcredential_file_path = 'data/Microcredenciais.xlsx'  # Make sure the file path is correct
     microcredential_data = load_microcredentials(microcredential_file_path)
 
     # Save the microcredential data to a new Excel file
@@ -230,41 +276,25 @@ def main():
     microcredential_data.to_excel(output_microcredential_file, index=False)
     print(f"\nMicrocredential data saved to '{output_microcredential_file}'")
 
-    # ------------------------------- Combined Data processing ------------------------------- #
-    # Combine the microcredential data with the master and specialization curricular plans
-    uc_data = pd.concat([msc_combined_master_data, ce_combined_data, microcredential_data], ignore_index=True, sort=False)
-
-    # ------------------------------- Add URL column ------------------------------- #
-    # Load the link info file
-    link_info_file_path = 'DPUCs - contents + objectives.xlsx'
-    link_info = pd.read_excel(link_info_file_path)
-
-    # Merge the UC data with the link info on CODDISCIPLINACOD (UC data) and CodigoPACO (link info)
-    uc_data = pd.merge(uc_data, link_info[['CodigoPACO', 'Url']], left_on='CODDISCIPLINACOD', right_on='CodigoPACO', how='left')
-
-    # Drop the 'CodigoPACO' column after the merge
-    uc_data.drop('CodigoPACO', axis=1, inplace=True)
-
-    # Normalize the 'NOMEDISCIPLINA' column to uppercase
-    uc_data['NOMEDISCIPLINA'] = uc_data['NOMEDISCIPLINA'].str.upper()
-
-    # Normalize the 'DEPARTMENT' column to uppercase
-    uc_data['DEPARTMENT'] = uc_data['DEPARTMENT'].str.upper()
-
-    # Filter out rows that contain "Opção" in the NOMEDISCIPLINA column
-    uc_data = uc_data[~uc_data['NOMEDISCIPLINA'].str.contains("OPÇÃO", na=False)]
+    return microcredential_data
 
-    # Keep only the columns you need after the merge
-    uc_data = uc_data[['CODDISCIPLINACOD', 'NOMEDISCIPLINA', 'DEPARTMENT', 'MSC', 'RAMO', 'CE', 'Microcredencial', 'Url']]
+def process_uc_data(msc_combined_master_data, ce_combined_data, microcredential_data, link_info):
+    # Combine all programmes, add the URL column and remove duplicates
+    uc_data, duplicate_report = build_uc_data(msc_combined_master_data, ce_combined_data, microcredential_data, link_info)
 
-    # Remove duplicates only if all columns are the same
-    uc_data = uc_data.drop_duplicates()
+    # Save the duplicate report to a new Excel file
+    output_duplicates_file = 'UC_duplicates.xlsx'
+    duplicate_report.to_excel(output_duplicates_file, index=False)
+    print(f"\n{len(duplicate_report)} groups of duplicated rows ({DEDUP_POLICY} policy) explained in '{output_duplicates_file}'")
 
     # Save the uc data to a new Excel file
     output_uc_file = 'UC_all.xlsx'
     uc_data.to_excel(output_uc_file, index=False)
     print(f"\nUC data saved to '{output_uc_file}'")
 
+    return uc_data
+
+def process_ce_in_msc(uc_data):
     # Check if CEs are part of any MsC programs
     ce_in_msc_df = check_ce_in_msc(uc_data)
 
@@ -273,6 +303,39 @@ def main():
     ce_in_msc_df.to_excel(output_file, index=False)
     print(f"\nCE in MsC check results saved to '{output_file}'")
 
+    return ce_in_msc_df
+
+def main():
+    # ------------------------------- CE processing ------------------------------- #
+    # Specify the folder containing the Excel files (make sure the folder path is correct)
+    ce_combined_data = process_ce('data/CE')
+
+    # ------------------------------- Msc processing ------------------------------- #
+    msc_combined_master_data = process_msc("data/MSC")
+
+    # ------------------------------- MicroCred processing ------------------------------- #
+    # Make sure the file path is correct
+    microcredential_data = process_microcredentials('data/Microcredenciais.xlsx')
+
+    # ------------------------------- Combined Data processing ------------------------------- #
+    # Load only the CodigoPACO and Url columns of the link info file (cached until the workbook changes)
+    link_info_file_path = 'DPUCs - contents + objectives.xlsx'
+    link_info = load_dpuc_urls(link_info_file_path)
+
+    # Combine all programmes, add the URL column, remove duplicates and save the results
+    uc_data = process_uc_data(msc_combined_master_data, ce_combined_data, microcredential_data, link_info)
+
+    # Store the build as an immutable snapshot so that it can be compared with other academic years
+    snapshot_id = save_snapshot(uc_data)
+    print(f"\nUC data stored as snapshot '{snapshot_id}'")
+
+    # Check if CEs are part of any MsC programs and save the results
+    ce_in_msc_df = process_ce_in_msc(uc_data)
+
+    # Publish the dataset for the dashboard replicas (memory-mapped, swapped in atomically)
+    dataset_version = publish_dataset(uc_data, ce_in_msc_df)
+    print(f"\nDataset version '{dataset_version}' published for the dashboard")
+
 
 if __name__ == "__main__":
     main()
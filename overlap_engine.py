@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# Programme types in bit order (label -> dataset column). Besides an entry here and in PROGRAM_TYPE_NAMES, a new type
+# needs its column in deduplication.DATASET_COLUMNS (and in the 'programme' policy of DEDUP_POLICIES) and a loader in
+# main.py filling that column (snapshots and the static export tables follow DATASET_COLUMNS)
+PROGRAM_TYPES = {
+    'MsC': 'MSC',
+    'CE': 'CE',
+    'μC': 'Microcredencial'
+}
+
+# Long names of the programme types, as used in the dashboard
+PROGRAM_TYPE_NAMES = {
+    'MsC': 'Master programs (MsC)',
+    'CE': 'Especialization programs (CE)',
+    'μC': 'Microcredentials (μC)'
+}
+
+
+def region_types(mask, labels):
+    # Programme types whose bit is set in the mask
+    return [label for bit, label in enumerate(labels) if mask >> bit & 1]
+
+
+def region_label(mask, labels):
+    # e.g. 'MsC+CE' for the disciplines in both MsC and CE programmes (and in no other type)
+    return '+'.join(region_types(mask, labels))
+
+
+def venn_region_id(mask, labels):
+    # Region id used by matplotlib_venn: one character per set, e.g. '110' for MsC+CE
+    return ''.join('1' if mask >> bit & 1 else '0' for bit in range(len(labels)))
+
+
+def join_types(labels):
+    # e.g. 'MsC, CE and μC' (the wording of the dashboard and the static export)
+    return labels[0] if len(labels) == 1 else f"{', '.join(labels[:-1])} and {labels[-1]}"
+
+
+def membership_masks(uc_data, program_types=PROGRAM_TYPES, group_column=None):
+    """Return the membership bitmask of every discipline (bit i is set if it belongs to a programme of the i-th type).
+
+    With a group column (e.g. DEPARTMENT) the masks are computed per group and discipline in the same pass.
+    """
+    keys = ['CODDISCIPLINACOD'] if group_column is None else [group_column, 'CODDISCIPLINACOD']
+
+    # One boolean column per programme type, reduced per discipline with a single grouping
+    membership = pd.DataFrame({label: uc_data[column].notna().to_numpy(dtype=bool) for label, column in program_types.items()})
+    for key in keys:
+        membership[key] = uc_data[key].to_numpy()
+    membership = membership.groupby(keys, sort=True).any()
+
+    weights = np.left_shift(1, np.arange(len(program_types), dtype=np.int64))
+    return pd.Series(membership.to_numpy(dtype=np.int64) @ weights, index=membership.index, name='MASK')
+
+
+def overlap_table(masks, labels=tuple(PROGRAM_TYPES)):
+    """Return one row per region (all 2^N combinations of programme types) with its size and sorted members."""
+    labels = list(labels)
+    region_count = 1 << len(labels)
+    values = masks.to_numpy()
+    codes = masks.index.to_numpy()
+
+    # Sorting by mask puts the members of every region next to each other (codes stay sorted within a region)
+    order = np.argsort(values, kind='stable')
+    boundaries = np.searchsorted(values[order], np.arange(region_count + 1))
+    sorted_codes = codes[order]
+
+    regions = pd.DataFrame({
+        'MASK': np.arange(region_count),
+        'REGION': [region_label(mask, labels) for mask in range(region_count)],
+        'DEGREE': [bin(mask).count('1') for mask in range(region_count)],
+        'COUNT': np.diff(boundaries),
+        'DISCIPLINES': [sorted_codes[boundaries[mask]:boundaries[mask + 1]].tolist() for mask in range(region_count)]
+    })
+
+    # Exclusive regions first, then the overlaps of two types, and so on
+    return regions.sort_values(by=['DEGREE', 'MASK'], kind='stable').reset_index(drop=True)
+
+
+def compute_overlaps(uc_data, program_types=PROGRAM_TYPES):
+    # Membership masks and regions of the disciplines in the given rows
+    return overlap_table(membership_masks(uc_data, program_types), program_types)
+
+
+def type_counts(regions, labels=tuple(PROGRAM_TYPES)):
+    # Number of disciplines in each programme type (the union of the regions containing its bit)
+    masks = regions['MASK'].to_numpy()
+    return {label: int(regions['COUNT'].to_numpy()[(masks >> bit & 1) == 1].sum()) for bit, label in enumerate(labels)}
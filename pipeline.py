@@ -0,0 +1,222 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from dpuc_loader import DPUC_FILE, load_dpuc_urls
+from main import process_ce, process_ce_in_msc, process_microcredentials, process_msc, process_uc_data
+from msc_branch_processing import process_branch_files
+from shared_dataset import CURRENT_FILE, DATASET_FOLDER, publish_dataset
+from signatures import path_signature
+from snapshots import SNAPSHOT_FOLDER, SNAPSHOT_INDEX, save_snapshot
+
+# Folder holding the result of every stage and the fingerprint of the inputs it was computed from
+PIPELINE_CACHE_FOLDER = os.path.join('.cache', 'pipeline')
+
+# Folder of the pipeline code
+CODE_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+
+def code_inputs(module_file):
+    """Return the module and every module of this folder it imports (directly or not, at the top or in a function)."""
+    found = []
+    pending = [module_file]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.append(path)
+        with open(os.path.join(CODE_FOLDER, path), encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = f"{name.split('.')[0]}.py"
+                # Only the modules of this folder are code of the pipeline (libraries are not fingerprinted)
+                if os.path.exists(os.path.join(CODE_FOLDER, candidate)):
+                    pending.append(candidate)
+    return sorted(found)
+
+
+# Stages of main.py (and msc_branch_processing.py), in an order compatible with their dependencies:
+# - run: the function computing the stage, called with the constant args and then with the results of the deps
+# - inputs: files and folders read by the stage (including its code and the modules it imports), whose signatures make up its fingerprint
+# - deps: stages whose results are passed to the stage; after: stages that only need to run first
+# - outputs: files written by the stage, which is run again if one of them is missing
+STAGES = {
+    'branches': {
+        'run': process_branch_files, 'args': ['data/MSC'], 'deps': [], 'after': [],
+        'inputs': ['data/MSC'] + code_inputs('msc_branch_processing.py'), 'outputs': []
+    },
+    'ce': {
+        'run': process_ce, 'args': ['data/CE'], 'deps': [], 'after': [],
+        'inputs': ['data/CE'] + code_inputs('main.py'), 'outputs': ['CE_combined.xlsx', 'UC_CE.xlsx']
+    },
+    'msc': {
+        'run': process_msc, 'args': ['data/MSC'], 'deps': [], 'after': ['branches'],
+        'inputs': ['data/MSC'] + code_inputs('main.py'), 'outputs': ['MSC_combined.xlsx', 'UC_MSC.xlsx']
+    },
+    'microcredentials': {
+        'run': process_microcredentials, 'args': ['data/Microcredenciais.xlsx'], 'deps': [], 'after': [],
+        'inputs': ['data/Microcredenciais.xlsx'] + code_inputs('main.py'), 'outputs': ['UC_Microcredenciais.xlsx']
+    },
+    'dpuc': {
+        'run': load_dpuc_urls, 'args': [DPUC_FILE], 'deps': [], 'after': [],
+        'inputs': [DPUC_FILE] + code_inputs('dpuc_loader.py'), 'outputs': []
+    },
+    'uc_data': {
+        'run': process_uc_data, 'args': [], 'deps': ['msc', 'ce', 'microcredentials', 'dpuc'], 'after': [],
+        'inputs': code_inputs('main.py'), 'outputs': ['UC_all.xlsx', 'UC_duplicates.xlsx']
+    },
+    'snapshot': {
+        'run': save_snapshot, 'args': [], 'deps': ['uc_data'], 'after': [],
+        'inputs': code_inputs('snapshots.py'), 'outputs': [os.path.join(SNAPSHOT_FOLDER, SNAPSHOT_INDEX)]
+    },
+    'ce_in_msc': {
+        'run': process_ce_in_msc, 'args': [], 'deps': ['uc_data'], 'after': [],
+        'inputs': code_inputs('main.py'), 'outputs': ['CE_in_MsC.xlsx']
+    },
+    'publish': {
+        'run': publish_dataset, 'args': [], 'deps': ['uc_data', 'ce_in_msc'], 'after': [],
+        'inputs': code_inputs('shared_dataset.py'), 'outputs': [os.path.join(DATASET_FOLDER, CURRENT_FILE)]
+    }
+}
+
+
+def stage_fingerprint(name, upstream_fingerprints, stages=STAGES):
+    """Fingerprint of a stage: the signatures of its inputs and the fingerprints of the stages it depends on."""
+    stage = stages[name]
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        'stage': name,
+        'args': stage['args'],
+        'inputs': [path_signature(path) for path in stage['inputs']],
+        'upstream': [upstream_fingerprints[dependency] for dependency in stage['deps'] + stage['after']]
+    }).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def required_stages(targets, stages=STAGES):
+    # The targets and every stage they depend on, in the order of the stage list
+    required = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in stages:
+            raise KeyError(f"Unknown stage '{name}' (available: {', '.join(stages)})")
+        if name not in required:
+            required.add(name)
+            pending.extend(stages[name]['deps'] + stages[name]['after'])
+    return [name for name in stages if name in required]
+
+
+def _cache_paths(name, cache_folder):
+    return os.path.join(cache_folder, f"{name}.pkl"), os.path.join(cache_folder, f"{name}.json")
+
+
+def _cached_fingerprints(name, cache_folder):
+    # Fingerprints the cached result of a stage is valid for
+    result_path, fingerprint_path = _cache_paths(name, cache_folder)
+    if not os.path.exists(result_path) or not os.path.exists(fingerprint_path):
+        return []
+    with open(fingerprint_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _store_result(name, result, fingerprints, cache_folder):
+    # Write the result first and its fingerprints last, so that an interrupted write is never used
+    result_path, fingerprint_path = _cache_paths(name, cache_folder)
+    os.makedirs(cache_folder, exist_ok=True)
+    pd.to_pickle(result, f"{result_path}.tmp")
+    os.replace(f"{result_path}.tmp", result_path)
+    with open(f"{fingerprint_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(fingerprints, f)
+    os.replace(f"{fingerprint_path}.tmp", fingerprint_path)
+
+
+def run_pipeline(targets=None, force=False, workers=None, cache_folder=PIPELINE_CACHE_FOLDER, stages=STAGES):
+    """Run the targets (every stage by default) and the stages they depend on, and return the target results.
+
+    A stage whose fingerprint matches its cached result (and whose output files exist) is not run again.
+    Stages whose dependencies are ready run concurrently in separate processes.
+    """
+    order = required_stages(targets or list(stages), stages)
+    fingerprints = {}
+    results = {}
+    report = {}
+
+    def result_of(name):
+        # Results of stages that were not run are only read from the cache when another stage needs them
+        if name not in results:
+            results[name] = pd.read_pickle(_cache_paths(name, cache_folder)[0])
+        return results[name]
+
+    pending = list(order)
+    running = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for name in list(pending):
+                stage = stages[name]
+                if any(dependency not in fingerprints for dependency in stage['deps'] + stage['after']):
+                    continue
+                pending.remove(name)
+
+                # Signatures are taken once the dependencies are done (they may rewrite their inputs)
+                fingerprint = stage_fingerprint(name, fingerprints, stages)
+                outputs_exist = all(os.path.exists(path) for path in stage['outputs'])
+                if not force and outputs_exist and fingerprint in _cached_fingerprints(name, cache_folder):
+                    fingerprints[name] = fingerprint
+                    report[name] = {'status': 'cached', 'seconds': 0.0}
+                    continue
+
+                print(f"Running stage '{name}'")
+                arguments = stage['args'] + [result_of(dependency) for dependency in stage['deps']]
+                running[executor.submit(stage['run'], *arguments)] = (name, fingerprint, time.perf_counter())
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, fingerprint, start = running.pop(future)
+                results[name] = future.result()
+
+                # Stages rewriting their own inputs (branch splitting) are also valid for the rewritten inputs
+                valid_fingerprints = [fingerprint]
+                rewritten = stage_fingerprint(name, fingerprints, stages)
+                if rewritten != fingerprint:
+                    valid_fingerprints.append(rewritten)
+                _store_result(name, results[name], valid_fingerprints, cache_folder)
+
+                fingerprints[name] = rewritten
+                report[name] = {'status': 'ran', 'seconds': round(time.perf_counter() - start, 4)}
+
+    return {name: result_of(name) for name in (targets or list(stages))}, {name: report[name] for name in order}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the curriculum data pipeline, reusing the cached result of every stage whose inputs did not change.")
+    parser.add_argument('targets', nargs='*', help=f"stages to run with their dependencies (default all): {', '.join(STAGES)}")
+    parser.add_argument('--force', action='store_true', help="run the stages even if their cached result is up to date")
+    parser.add_argument('--workers', type=int, help="number of stages run at the same time (default: number of CPUs)")
+    args = parser.parse_args()
+
+    _, report = run_pipeline(args.targets, args.force, args.workers)
+
+    print("\nPipeline stages:")
+    for name, stage_report in report.items():
+        print(f"  {name:<18} {stage_report['status']:<8} {stage_report['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
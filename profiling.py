@@ -0,0 +1,293 @@
+import argparse
+import contextlib
+import functools
+import hmac
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+# Set this environment variable (e.g. UA_PROFILE=1 streamlit run showdata.py) to report the startup profile
+PROFILE_ENV_VAR = 'UA_PROFILE'
+
+# Libraries imported by the dashboard, in the order it needs them
+DASHBOARD_MODULES = ['pandas', 'streamlit', 'pyarrow', 'openpyxl', 'plotly.express', 'matplotlib.pyplot', 'matplotlib_venn']
+
+# Set this environment variable to a secret to collect the hot-path timings and show the admin-only
+# diagnostics tab, which is opened by adding ?diagnostics=<secret> to the dashboard URL
+DIAGNOSTICS_TOKEN_ENV_VAR = 'UA_DIAGNOSTICS_TOKEN'
+
+# Number of recent runs the rolling percentiles are computed over
+ROLLING_WINDOW = 200
+
+# Percentiles reported for the run time, every phase and every section
+REPORTED_PERCENTILES = [50, 90, 99]
+
+# Sessions not seen for this long are dropped from the memory report
+SESSION_EXPIRY_SECONDS = 3600
+
+# Number of script runs profiled by this process so far (only the first one pays for the deferred imports)
+_profiled_runs = [0]
+
+# Statistics shared by every session of the process (sessions run in separate threads)
+_diagnostics_lock = threading.Lock()
+_run_history = {}
+_cache_stats = {}
+_session_stats = {}
+
+
+def profiling_enabled():
+    return os.environ.get(PROFILE_ENV_VAR, '') not in ('', '0')
+
+
+def instrumentation_enabled():
+    # Sections, caches and sessions are only measured when profiling or the diagnostics tab is enabled
+    return profiling_enabled() or bool(os.environ.get(DIAGNOSTICS_TOKEN_ENV_VAR))
+
+
+def diagnostics_allowed(token):
+    # The diagnostics tab is only shown to whoever knows the configured token
+    expected = os.environ.get(DIAGNOSTICS_TOKEN_ENV_VAR, '')
+    return bool(expected) and hmac.compare_digest(str(token or ''), expected)
+
+
+def start_profile():
+    """Return a new profile, timing the phases of one script run from now on."""
+    now = time.perf_counter()
+    _profiled_runs[0] += 1
+    return {
+        'cold': _profiled_runs[0] == 1, 'enabled': instrumentation_enabled(),
+        'started': now, 'last': now, 'phases': {}, 'sections': {}, 'imports': {}
+    }
+
+
+def record_phase(profile, name):
+    # Time spent since the previous phase (or the start of the run)
+    now = time.perf_counter()
+    profile['phases'][name] = round(now - profile['last'], 4)
+    profile['last'] = now
+
+
+@contextlib.contextmanager
+def timed_section(profile, name):
+    """Add the time spent in the block to a named section of the run (a section can be entered several times)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if profile['enabled']:
+            profile['sections'][name] = round(profile['sections'].get(name, 0.0) + time.perf_counter() - start, 4)
+
+
+def _count_cache(name, counter):
+    if instrumentation_enabled():
+        with _diagnostics_lock:
+            stats = _cache_stats.setdefault(name, {'calls': 0, 'misses': 0})
+            stats[counter] += 1
+
+
+def tracked_cache(name, cache_decorator):
+    """Apply a Streamlit cache decorator and count its calls and misses (the cached function only runs on a miss)."""
+    def decorate(func):
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            _count_cache(name, 'misses')
+            return func(*args, **kwargs)
+
+        # Streamlit follows the wrapper to the original function, so the cache keys do not change
+        cached = cache_decorator(compute)
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            _count_cache(name, 'calls')
+            return cached(*args, **kwargs)
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
+
+def deferred_import(module_name, profile=None):
+    """Import a module the first time it is needed and record how long the import took."""
+    # The import system is always used, so that a session never gets a module another session is still importing
+    already_imported = module_name in sys.modules
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if profile is not None and not already_imported:
+        profile['imports'][module_name] = round(time.perf_counter() - start, 4)
+    return module
+
+
+def profile_summary(profile):
+    # JSON-friendly view of a profile (the phases include the deferred imports they triggered)
+    return {
+        'cold': profile['cold'],
+        'total': round(profile['last'] - profile['started'], 4),
+        'phases': profile['phases'],
+        'sections': profile['sections'],
+        'deferred_imports': profile['imports']
+    }
+
+
+def _estimate_size(value):
+    # Deep size of data frames and series, shallow size of anything else
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    return sys.getsizeof(value)
+
+
+def session_memory(values, shared=()):
+    # Bytes held by the values of a session state, not counting the objects shared with the other sessions
+    return sum(_estimate_size(value) for value in values if not any(value is shared_value for shared_value in shared))
+
+
+def record_run(profile, session_id=None, session_bytes=None):
+    """Add the timings of a finished run to the rolling statistics of the process, with the memory held by its session."""
+    if not profile['enabled']:
+        return
+    now = time.time()
+    samples = {'total': round(time.perf_counter() - profile['started'], 4)}
+    samples.update({f"phase/{name}": seconds for name, seconds in profile['phases'].items()})
+    samples.update({f"section/{name}": seconds for name, seconds in profile['sections'].items()})
+
+    with _diagnostics_lock:
+        for name, seconds in samples.items():
+            _run_history.setdefault(name, deque(maxlen=ROLLING_WINDOW)).append(seconds)
+
+        if session_id is not None:
+            session = _session_stats.setdefault(session_id, {'runs': 0})
+            session['runs'] += 1
+            session['bytes'] = session_bytes
+            session['last_seen'] = now
+
+        # Forget the sessions that were closed
+        for expired in [key for key, session in _session_stats.items() if now - session['last_seen'] > SESSION_EXPIRY_SECONDS]:
+            del _session_stats[expired]
+
+
+def _percentile(values, percent):
+    # Linear interpolation between the closest ranks (as pandas does)
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return round(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower), 4)
+
+
+def peak_memory_mb():
+    # Peak resident memory of the current process (not available on Windows)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def diagnostics_report():
+    """Return the rolling timings, the cache hit rates and the session memory of the process (JSON-friendly)."""
+    now = time.time()
+    with _diagnostics_lock:
+        timings = {
+            name: dict({'runs': len(history)}, **{f"p{percent}": _percentile(history, percent) for percent in REPORTED_PERCENTILES}, max=max(history))
+            for name, history in sorted(_run_history.items())
+        }
+        caches = {
+            name: {
+                'calls': stats['calls'],
+                'hits': stats['calls'] - stats['misses'],
+                'misses': stats['misses'],
+                'hit_rate': round((stats['calls'] - stats['misses']) / stats['calls'], 3) if stats['calls'] else None
+            }
+            for name, stats in sorted(_cache_stats.items())
+        }
+        sessions = {
+            session_id: {
+                'memory_mb': round(session['bytes'] / (1024 * 1024), 2) if session['bytes'] is not None else None,
+                'runs': session['runs'],
+                'idle_seconds': round(now - session['last_seen'], 1)
+            }
+            for session_id, session in _session_stats.items()
+        }
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'window': ROLLING_WINDOW,
+        'peak_memory_mb': peak_memory_mb(),
+        'timings': timings,
+        'caches': caches,
+        'sessions': sessions
+    }
+
+
+def measure_import_times(modules=DASHBOARD_MODULES):
+    """Import the modules one after the other in a fresh interpreter and return the extra time each one took."""
+    code = '; '.join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, check=True)
+
+    # Lines look like "import time: <self us> | <cumulative us> | <indented module name>"
+    times = {module: 0.0 for module in modules}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        name = name.strip()
+        if name in times and cumulative.strip().isdigit():
+            times[name] = round(int(cumulative) / 1e6, 4)
+    return times
+
+
+def measure_dataset_loading():
+    # Time every way the dashboard can load its data from the current folder, slowest first
+    from shared_dataset import current_dataset_version, open_dataset, read_excel_cached
+    import pandas as pd
+
+    timings = {}
+    start = time.perf_counter()
+    pd.read_excel('UC_all.xlsx')
+    pd.read_excel('CE_in_MsC.xlsx')
+    timings['excel'] = round(time.perf_counter() - start, 4)
+
+    # The first call builds the Parquet copies when they are missing or out of date
+    read_excel_cached('UC_all.xlsx')
+    read_excel_cached('CE_in_MsC.xlsx')
+    start = time.perf_counter()
+    read_excel_cached('UC_all.xlsx')
+    read_excel_cached('CE_in_MsC.xlsx')
+    timings['parquet_copy'] = round(time.perf_counter() - start, 4)
+
+    if current_dataset_version() is not None:
+        start = time.perf_counter()
+        open_dataset()
+        timings['shared_dataset'] = round(time.perf_counter() - start, 4)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Break down the dashboard start-up time: library imports and data loading.")
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {'imports': measure_import_times(), 'dataset_loading': measure_dataset_loading()}
+
+    print("Import time of the dashboard libraries (on top of the previous ones):")
+    for module, seconds in results['imports'].items():
+        print(f"  {module:<20} {seconds}s")
+    print("Dataset loading time by source:")
+    for source, seconds in results['dataset_loading'].items():
+        print(f"  {source:<20} {seconds}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nStartup profile saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import argparse
+import time
+import unicodedata
+
+import pandas as pd
+
+from dpuc_loader import DPUC_KEY_COLUMN, load_dpuc_texts
+from overlap_engine import PROGRAM_TYPES
+
+# Columns of the DPUC workbook searched for topics
+TOPIC_COLUMNS = ['Title', 'Objectivos', 'Programa']
+
+# The exact search only runs when the greedy cover needs at most this many programmes (besides the forced ones)
+EXACT_SEARCH_MAX_PROGRAMMES = 20
+
+# Time budget of the exact search, after which the best cover found so far is kept
+EXACT_SEARCH_SECONDS = 0.5
+
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+def _mask_codes(mask, target):
+    # Target disciplines whose bit is set in the mask
+    codes = []
+    while mask:
+        bit = mask & -mask
+        codes.append(target[bit.bit_length() - 1])
+        mask ^= bit
+    return codes
+
+
+def build_catalogue(uc_data, program_types=PROGRAM_TYPES):
+    """Index the programmes of every discipline, so that a cover only looks at the programmes touching its target."""
+    programmes = []
+    discipline_programmes = {}
+    for program_type, column in program_types.items():
+        rows = uc_data.loc[uc_data[column].notna(), [column, 'CODDISCIPLINACOD']].drop_duplicates()
+        rows = rows.sort_values(by=[column, 'CODDISCIPLINACOD'])
+        for programme, codes in rows.groupby(column, sort=True)['CODDISCIPLINACOD']:
+            programme_id = len(programmes)
+            programmes.append({'programme': programme, 'type': program_type, 'size': len(codes)})
+            for code in codes:
+                discipline_programmes.setdefault(str(code), []).append(programme_id)
+
+    # Name of every discipline, for the reports
+    names = uc_data.drop_duplicates(subset='CODDISCIPLINACOD')
+    return {
+        'programmes': programmes,
+        'discipline_programmes': discipline_programmes,
+        'names': dict(zip(names['CODDISCIPLINACOD'].astype(str), names['NOMEDISCIPLINA']))
+    }
+
+
+def _local_masks(catalogue, target, program_types=None):
+    # Bitset of every candidate programme over the target disciplines only (bit i = i-th target discipline)
+    masks = {}
+    for bit, code in enumerate(target):
+        for programme_id in catalogue['discipline_programmes'].get(code, []):
+            if program_types is None or catalogue['programmes'][programme_id]['type'] in program_types:
+                masks[programme_id] = masks.get(programme_id, 0) | (1 << bit)
+    return masks
+
+
+def _programmes_by_bit(masks):
+    # Programmes covering every target discipline (keyed by the discipline bit)
+    by_bit = {}
+    for programme_id, mask in masks.items():
+        remaining = mask
+        while remaining:
+            bit = remaining & -remaining
+            by_bit.setdefault(bit, []).append(programme_id)
+            remaining ^= bit
+    return by_bit
+
+
+def _remove_dominated(masks, programmes):
+    # A programme covering a subset of what another programme covers is never needed (the smaller programme is kept on ties)
+    ordered = sorted(masks.items(), key=lambda item: (-_popcount(item[1]), programmes[item[0]]['size'], item[0]))
+    kept = {}
+    for programme_id, mask in ordered:
+        if not any(mask & other == mask for other in kept.values()):
+            kept[programme_id] = mask
+    return kept
+
+
+def _greedy_cover(masks, programmes, universe):
+    # Repeatedly take the programme covering the most uncovered disciplines (the smallest programme on ties)
+    uncovered = universe
+    chosen = []
+    while uncovered:
+        programme_id, mask = max(masks.items(), key=lambda item: (_popcount(item[1] & uncovered), -programmes[item[0]]['size'], -item[0]))
+        if not mask & uncovered:
+            break
+        chosen.append(programme_id)
+        uncovered &= ~mask
+    return chosen
+
+
+def _exact_cover(masks, universe, best, time_budget=EXACT_SEARCH_SECONDS):
+    # Branch and bound: branch on the uncovered discipline with the fewest programmes, bound by the largest programme
+    largest = max(_popcount(mask) for mask in masks.values())
+    by_bit = _programmes_by_bit(masks)
+    for candidates in by_bit.values():
+        candidates.sort(key=lambda programme_id: -_popcount(masks[programme_id]))
+
+    deadline = time.perf_counter() + time_budget
+    state = {'best': list(best), 'nodes': 0, 'complete': True}
+
+    def search(uncovered, chosen):
+        state['nodes'] += 1
+        if not state['complete'] or (state['nodes'] % 1000 == 0 and time.perf_counter() > deadline):
+            state['complete'] = False
+            return
+        if not uncovered:
+            if len(chosen) < len(state['best']):
+                state['best'] = list(chosen)
+            return
+        # Even the largest programmes cannot finish the cover with fewer programmes than the best one
+        if len(chosen) + -(-_popcount(uncovered) // largest) >= len(state['best']):
+            return
+        remaining = uncovered
+        pivot, pivot_candidates = None, None
+        while remaining:
+            bit = remaining & -remaining
+            if pivot is None or len(by_bit[bit]) < len(pivot_candidates):
+                pivot, pivot_candidates = bit, by_bit[bit]
+            remaining ^= bit
+        for programme_id in pivot_candidates:
+            chosen.append(programme_id)
+            search(uncovered & ~masks[programme_id], chosen)
+            chosen.pop()
+
+    search(universe, [])
+    return state['best'], state['complete']
+
+
+def plan_cover(catalogue, target_codes, program_types=None, exact=True):
+    """Find the smallest set of existing programmes covering the target disciplines.
+
+    Disciplines that no programme (of the allowed types) teaches are reported as uncoverable.
+    The greedy cover is improved by an exact search, which reports whether it proved the cover optimal.
+    """
+    start = time.perf_counter()
+    target = sorted({str(code) for code in target_codes})
+    programmes = catalogue['programmes']
+    masks = _local_masks(catalogue, target, program_types)
+
+    coverable = 0
+    for mask in masks.values():
+        coverable |= mask
+
+    # Disciplines taught by a single programme force that programme into every cover
+    forced = sorted({candidates[0] for candidates in _programmes_by_bit(masks).values() if len(candidates) == 1})
+    forced_cover = 0
+    for programme_id in forced:
+        forced_cover |= masks[programme_id]
+
+    # The rest of the target is covered by the remaining programmes (restricted to what is still uncovered)
+    remaining = coverable & ~forced_cover
+    reduced = {programme_id: mask & remaining for programme_id, mask in masks.items() if mask & remaining and programme_id not in forced}
+    reduced = _remove_dominated(reduced, programmes)
+
+    chosen = _greedy_cover(reduced, programmes, remaining) if reduced else []
+    optimal = len(chosen) <= 1
+    if exact and not optimal and len(chosen) <= EXACT_SEARCH_MAX_PROGRAMMES:
+        chosen, optimal = _exact_cover(reduced, remaining, chosen)
+    chosen = forced + chosen
+
+    # Report the programmes in the order they add the most new disciplines
+    result_programmes = []
+    covered = 0
+    for programme_id in sorted(chosen, key=lambda programme_id: -_popcount(masks[programme_id])):
+        new = masks[programme_id] & ~covered
+        covered |= masks[programme_id]
+        result_programmes.append({
+            'programme': programmes[programme_id]['programme'],
+            'type': programmes[programme_id]['type'],
+            'size': programmes[programme_id]['size'],
+            'covers': _mask_codes(masks[programme_id], target),
+            'new': _mask_codes(new, target)
+        })
+
+    return {
+        'target': target,
+        'programmes': result_programmes,
+        'uncoverable': _mask_codes(((1 << len(target)) - 1) & ~coverable, target),
+        'optimal': optimal,
+        'seconds': round(time.perf_counter() - start, 4)
+    }
+
+
+def best_covering_programmes(catalogue, target_codes, program_type='MsC', count=5):
+    """Return the programmes of one type covering the most target disciplines (the smallest programmes first on ties)."""
+    target = sorted({str(code) for code in target_codes})
+    programmes = catalogue['programmes']
+    masks = _local_masks(catalogue, target, [program_type])
+    ranked = sorted(masks.items(), key=lambda item: (-_popcount(item[1]), programmes[item[0]]['size'], programmes[item[0]]['programme']))
+    return [{
+        'programme': programmes[programme_id]['programme'],
+        'size': programmes[programme_id]['size'],
+        'covered': _mask_codes(mask, target),
+        'missing': _mask_codes(((1 << len(target)) - 1) & ~mask, target)
+    } for programme_id, mask in ranked[:count]]
+
+
+def _normalise(text):
+    # Case and accent insensitive matching (e.g. 'Computação' matches 'computacao')
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(character for character in decomposed if not unicodedata.combining(character)).lower()
+
+
+def load_topic_texts(columns=TOPIC_COLUMNS):
+    # Searchable text of every DPUC, indexed by discipline code
+    texts = load_dpuc_texts(columns)
+    searchable = texts[columns].fillna('').astype(str).agg(' '.join, axis=1).map(_normalise)
+    return pd.Series(searchable.values, index=texts[DPUC_KEY_COLUMN].astype(str)).groupby(level=0).agg(' '.join)
+
+
+def topic_disciplines(topics, topic_texts, match_all=False):
+    """Return the codes of the disciplines whose DPUC title, objectives or contents mention the topics."""
+    matches = None
+    for topic in topics:
+        found = topic_texts.str.contains(_normalise(topic).strip(), regex=False)
+        matches = found if matches is None else (matches & found if match_all else matches | found)
+    return sorted(topic_texts.index[matches].tolist()) if matches is not None else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the existing programmes covering a set of disciplines or DPUC topics.")
+    parser.add_argument('codes', nargs='*', help="discipline codes (CODDISCIPLINACOD) to cover")
+    parser.add_argument('--topic', action='append', default=[], help="DPUC topic to cover (repeatable)")
+    parser.add_argument('--all-topics', action='store_true', help="only disciplines mentioning every topic")
+    parser.add_argument('--type', action='append', choices=list(PROGRAM_TYPES), help="programme types allowed in the cover (repeatable, default all)")
+    args = parser.parse_args()
+
+    from curriculum_index import load_dataset
+
+    uc_data, _ = load_dataset()
+    catalogue = build_catalogue(uc_data)
+
+    target = set(args.codes)
+    if args.topic:
+        target |= set(topic_disciplines(args.topic, load_topic_texts(), args.all_topics)) & set(catalogue['names'])
+    if not target:
+        parser.error("give at least one discipline code or topic")
+
+    plan = plan_cover(catalogue, target, args.type)
+    print(f"{len(plan['programmes'])} programmes cover {len(plan['target']) - len(plan['uncoverable'])} of the {len(plan['target'])} disciplines "
+          f"({'optimal' if plan['optimal'] else 'best found'}, {plan['seconds']}s):")
+    for programme in plan['programmes']:
+        print(f"- [{programme['type']}] {programme['programme']}: +{len(programme['new'])} disciplines")
+    if plan['uncoverable']:
+        print(f"Not taught by any programme: {', '.join(plan['uncoverable'])}")
+
+    print("\nBest covering MsC programmes:")
+    for programme in best_covering_programmes(catalogue, target):
+        print(f"- {programme['programme']}: {len(programme['covered'])} of {len(plan['target'])} disciplines")
+
+
+if __name__ == "__main__":
+    main()
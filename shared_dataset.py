@@ -0,0 +1,180 @@
+import json
+import os
+import shutil
+import sys
+
+import pandas as pd
+import pyarrow as pa
+
+from curriculum_index import dataset_version, load_dataset
+from deduplication import FINGERPRINT_COLUMN, add_fingerprints
+from department_matrix import shared_discipline_tables
+from signatures import file_signature
+
+# Folder holding one sub-folder per published version and the pointer to the current one
+DATASET_FOLDER = 'dataset'
+CURRENT_FILE = 'CURRENT'
+
+# Number of previous versions kept next to the current one (replicas may still have them mapped)
+KEEP_VERSIONS = 2
+
+# Arrow IPC files written for every version
+DATASET_TABLES = ['uc_all', 'ce_in_msc', 'department_rows', 'disciplines', 'department_pairs', 'shared_disciplines']
+
+# Folder holding Parquet copies of the Excel files, used when no dataset was published
+EXCEL_CACHE_FOLDER = os.path.join('.cache', 'excel')
+
+
+def _write_table(table, path):
+    # Uncompressed IPC file format, so that readers can map the buffers without copying them
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def build_dataset_tables(uc_data, ce_in_msc):
+    """Convert the UC data and the CE in MsC results to Arrow tables, together with the dashboard lookups."""
+    uc_data = uc_data.copy()
+    if FINGERPRINT_COLUMN not in uc_data.columns:
+        uc_data = add_fingerprints(uc_data)
+    uc_data['CODDISCIPLINACOD'] = uc_data['CODDISCIPLINACOD'].astype(str)
+    uc_data = uc_data.reset_index(drop=True)
+
+    # Row positions of every department (in order of first appearance), so that a department is selected without a scan
+    department_rows = uc_data.groupby('DEPARTMENT', sort=False).indices
+    department_rows_table = pa.table({
+        'DEPARTMENT': pa.array(list(department_rows), pa.string()),
+        'ROWS': pa.array([rows.tolist() for rows in department_rows.values()], pa.list_(pa.int32()))
+    })
+
+    # Options of the discipline selectbox
+    disciplines = uc_data[['NOMEDISCIPLINA', 'CODDISCIPLINACOD']].drop_duplicates()
+
+    # Department x department shared discipline counts and their drill-down lists
+    department_pairs, shared_disciplines = shared_discipline_tables(uc_data)
+
+    return {
+        'uc_all': pa.Table.from_pandas(uc_data, preserve_index=False),
+        'ce_in_msc': pa.Table.from_pandas(ce_in_msc.reset_index(drop=True), preserve_index=False),
+        'department_rows': department_rows_table,
+        'disciplines': pa.Table.from_pandas(disciplines, preserve_index=False),
+        'department_pairs': pa.Table.from_pandas(department_pairs, preserve_index=False),
+        'shared_disciplines': pa.Table.from_pandas(shared_disciplines, preserve_index=False)
+    }
+
+
+def current_dataset_version(folder=DATASET_FOLDER):
+    # Return the version currently published, or None if nothing was published yet
+    current_path = os.path.join(folder, CURRENT_FILE)
+    if not os.path.exists(current_path):
+        return None
+    with open(current_path, encoding='utf-8') as f:
+        return f.read().strip() or None
+
+
+def read_excel_cached(file_path, cache_folder=EXCEL_CACHE_FOLDER):
+    """Read an Excel file through a Parquet copy, which is rebuilt whenever the Excel file changes."""
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    cache_path = os.path.join(cache_folder, f"{name}.parquet")
+    signature_path = os.path.join(cache_folder, f"{name}.json")
+    signature = list(file_signature(file_path))
+
+    if os.path.exists(cache_path) and os.path.exists(signature_path):
+        with open(signature_path, encoding='utf-8') as f:
+            if json.load(f) == signature:
+                return pd.read_parquet(cache_path)
+
+    data = pd.read_excel(file_path)
+    os.makedirs(cache_folder, exist_ok=True)
+    try:
+        data.to_parquet(f"{cache_path}.tmp", index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columns mixing numbers and text cannot be stored as Parquet: keep reading the Excel file
+        return data
+    os.replace(f"{cache_path}.tmp", cache_path)
+    with open(signature_path, 'w', encoding='utf-8') as f:
+        json.dump(signature, f)
+    return data
+
+
+def _remove_old_versions(folder, current_version):
+    # Keep the current version and the most recent previous ones
+    versions = [
+        entry for entry in os.listdir(folder)
+        if entry != current_version and not entry.startswith('.') and os.path.isdir(os.path.join(folder, entry))
+    ]
+    versions.sort(key=lambda entry: os.path.getmtime(os.path.join(folder, entry)), reverse=True)
+    for version in versions[KEEP_VERSIONS:]:
+        # Pages already mapped by running replicas stay valid after the files are unlinked
+        shutil.rmtree(os.path.join(folder, version), ignore_errors=True)
+
+
+def publish_dataset(uc_data, ce_in_msc, folder=DATASET_FOLDER):
+    """Publish the dataset as memory-mappable Arrow IPC files and make it the current version."""
+    if FINGERPRINT_COLUMN not in uc_data.columns:
+        uc_data = add_fingerprints(uc_data)
+    version = dataset_version(uc_data, ce_in_msc)
+    tables = build_dataset_tables(uc_data, ce_in_msc)
+    version_folder = os.path.join(folder, version)
+
+    # Versions are immutable: the same content is already published under the same name
+    if not os.path.exists(version_folder):
+        os.makedirs(folder, exist_ok=True)
+        tmp_folder = os.path.join(folder, f".{version}.{os.getpid()}.tmp")
+        os.makedirs(tmp_folder, exist_ok=True)
+        for name, table in tables.items():
+            _write_table(table, os.path.join(tmp_folder, f"{name}.arrow"))
+        os.replace(tmp_folder, version_folder)
+    else:
+        # Versions published before a table was added only get the missing files
+        for name, table in tables.items():
+            table_path = os.path.join(version_folder, f"{name}.arrow")
+            if not os.path.exists(table_path):
+                _write_table(table, f"{table_path}.{os.getpid()}.tmp")
+                os.replace(f"{table_path}.{os.getpid()}.tmp", table_path)
+
+    # Swap the pointer atomically, so that readers see either the old or the new version
+    current_path = os.path.join(folder, CURRENT_FILE)
+    with open(f"{current_path}.tmp", 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(f"{current_path}.tmp", current_path)
+
+    _remove_old_versions(folder, version)
+    return version
+
+
+def open_dataset(version=None, folder=DATASET_FOLDER):
+    """Map a published version (the current one by default) read-only and return its data frames and lookups."""
+    version = version or current_dataset_version(folder)
+    if version is None:
+        return None
+
+    tables = {}
+    for name in DATASET_TABLES:
+        # The pages of the file are shared by every process mapping it
+        source = pa.memory_map(os.path.join(folder, version, f"{name}.arrow"), 'r')
+        tables[name] = pa.ipc.open_file(source).read_all()
+
+    # Row positions are views on the mapped file as well
+    department_rows = {
+        department: rows.values.to_numpy(zero_copy_only=True)
+        for department, rows in zip(tables['department_rows']['DEPARTMENT'].to_pylist(), tables['department_rows']['ROWS'])
+    }
+
+    # Arrow-backed columns keep pointing at the mapped buffers instead of being copied into Python objects
+    return {
+        'version': version,
+        'uc_data': tables['uc_all'].to_pandas(types_mapper=pd.ArrowDtype),
+        'ce_in_msc': tables['ce_in_msc'].to_pandas(types_mapper=pd.ArrowDtype),
+        'department_rows': department_rows,
+        'disciplines': tables['disciplines'].to_pandas(types_mapper=pd.ArrowDtype),
+        'department_pairs': tables['department_pairs'].to_pandas(types_mapper=pd.ArrowDtype),
+        'shared_disciplines': tables['shared_disciplines'].to_pandas(types_mapper=pd.ArrowDtype)
+    }
+
+
+if __name__ == "__main__":
+    # Publish the files produced by main.py (e.g. after editing them by hand)
+    uc_data, ce_in_msc = load_dataset()
+    version = publish_dataset(uc_data, ce_in_msc, sys.argv[1] if len(sys.argv) > 1 else DATASET_FOLDER)
+    print(f"Dataset version '{version}' published")
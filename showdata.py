@@ -1,14 +1,128 @@
+import json
+import os
+import uuid
 import pandas as pd
 import streamlit as st
-import plotly.express as px
-import matplotlib.pyplot as plt
-from matplotlib_venn import venn3
-
-plt.rcParams['font.family'] = 'serif'
+from deduplication import FINGERPRINT_COLUMN, add_fingerprints
+from snapshots import load_snapshot_index, load_snapshot, diff_snapshots
+from shared_dataset import current_dataset_version, open_dataset, read_excel_cached
+from signatures import file_signature
+from dpuc_loader import DPUC_FILE
+from set_cover import best_covering_programmes, build_catalogue, load_topic_texts, plan_cover, topic_disciplines
+from department_matrix import shared_discipline_tables, shared_disciplines, shared_matrix, top_pairs
+from overlap_engine import PROGRAM_TYPE_NAMES, PROGRAM_TYPES, compute_overlaps, join_types, region_types, type_counts, venn_region_id
+from profiling import (
+    ROLLING_WINDOW, deferred_import, diagnostics_allowed, diagnostics_report, profile_summary, profiling_enabled,
+    record_phase, record_run, session_memory, start_profile, timed_section, tracked_cache
+)
+
+# Time the phases of this run (reported when profiling is enabled)
+startup_profile = start_profile()
 
 # Set the theme to light mode in the app
 st.set_page_config(page_title="University Curriculum Data", layout="wide", page_icon="📊", initial_sidebar_state="expanded")
 
+# Streamlit app layout (sent to the browser before the data and the plotting libraries are loaded)
+st.title("University Curriculum Data Dashboard")
+record_phase(startup_profile, 'first_paint')
+
+
+# The plotting libraries are only imported when the first chart is drawn
+def load_pyplot():
+    plt = deferred_import('matplotlib.pyplot', startup_profile)
+    plt.rcParams['font.family'] = 'serif'
+    return plt
+
+
+def load_venn3():
+    return deferred_import('matplotlib_venn', startup_profile).venn3
+
+
+def load_plotly_express():
+    return deferred_import('plotly.express', startup_profile)
+
+
+def region_sentence(mask, count):
+    # One line of the general overview interpretation
+    labels = list(PROGRAM_TYPES)
+    types = region_types(mask, labels)
+    others = [label for label in labels if label not in types]
+    if len(types) == 1:
+        return f"- **{count}** disciplines are exclusive to **{PROGRAM_TYPE_NAMES[types[0]]}**."
+    if others:
+        return f"- **{count}** disciplines overlap between **{join_types(types)}** but **NOT** with **{join_types(others)}**."
+    return f"- **{count}** disciplines are common across **{join_types(types)}**."
+
+
+def region_explanation(mask, count):
+    # Explanation of one overlap region of a department
+    labels = list(PROGRAM_TYPES)
+    types = region_types(mask, labels)
+    others = [label for label in labels if label not in types]
+    if len(types) == 1:
+        return f"- **{types[0]} Only**: **{count}** disciplines exclusive to **{PROGRAM_TYPE_NAMES[types[0]]}**."
+    if others:
+        shared = ' and '.join(f"**{label}**" for label in types)
+        excluded = ' or '.join(f"**{label}**" for label in others)
+        return f"- **{join_types(types)} Only**: **{count}** disciplines shared between {shared} programs, but **NOT** with {excluded}."
+    return f"- **{join_types(types)}**: **{count}** disciplines common across **{join_types(types)}**."
+
+
+def discipline_link(url, text):
+    # Link opening the DPUC in a new tab, or the plain text when the discipline has no URL
+    if pd.isna(url):
+        return text
+    return f"<a href='{url}' target='_blank'>{text}</a>"
+
+
+def upset_figure(regions, title):
+    # UpSet-style chart for more than three programme types: size of every non-empty region above the types it combines
+    go = deferred_import('plotly.graph_objects', startup_profile)
+    subplots = deferred_import('plotly.subplots', startup_profile)
+    labels = list(PROGRAM_TYPES)
+    regions = regions[(regions['MASK'] > 0) & (regions['COUNT'] > 0)].sort_values(by='COUNT', ascending=False)
+    names = regions['REGION'].tolist()
+
+    fig = subplots.make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.65, 0.35], vertical_spacing=0.03)
+    fig.add_trace(go.Bar(x=names, y=regions['COUNT'], text=regions['COUNT'], textposition='outside', marker_color='#555555'), row=1, col=1)
+    for mask, name in zip(regions['MASK'], names):
+        types = region_types(mask, labels)
+        # Grey dots for every type, joined dark dots for the types of the region
+        fig.add_trace(go.Scatter(x=[name] * len(labels), y=labels, mode='markers', marker={'size': 12, 'color': '#DDDDDD'}), row=2, col=1)
+        fig.add_trace(go.Scatter(x=[name] * len(types), y=types, mode='lines+markers', marker={'size': 12, 'color': '#333333'}, line={'color': '#333333'}), row=2, col=1)
+    fig.update_layout(title=title, showlegend=False)
+    fig.update_xaxes(showticklabels=False, row=2, col=1)
+    return fig
+
+
+def draw_overlap_chart(regions, title):
+    # Venn diagram for three programme types, UpSet-style chart otherwise
+    labels = list(PROGRAM_TYPES)
+    if len(labels) != 3:
+        st.plotly_chart(upset_figure(regions, title))
+        return
+
+    plt, venn3 = load_pyplot(), load_venn3()
+    counts = type_counts(regions, labels)
+    fig, ax = plt.subplots(figsize=(6, 6))  # Keep a reasonable size for Venn diagram
+    # Add title to the Venn diagram
+    ax.set_title(title, fontsize=16)
+
+    # Region sizes in bitmask order, which is also the order expected by venn3 (100, 010, 110, 001, 101, 011, 111)
+    region_sizes = dict(zip(regions['MASK'], regions['COUNT']))
+    venn = venn3(subsets=[int(region_sizes[mask]) for mask in range(1, 8)], set_labels=[label if counts[label] > 0 else '' for label in labels])
+
+    # Set colors for the circles of the single programme type regions
+    for bit, label in enumerate(labels):
+        patch = venn.get_patch_by_id(venn_region_id(1 << bit, labels))
+        if patch is not None:  # Only apply color if the region exists
+            patch.set_facecolor(color_palette.get(label, f"C{bit}"))
+            patch.set_alpha(1)  # Adjust transparency
+            patch.set_antialiased(True)
+
+    st.pyplot(fig)
+
+
 # Define a color palette for consistency
 color_palette = {
     'MsC': '#FF4B4B',
@@ -16,114 +130,113 @@ color_palette = {
     'μC': '#4BB0FF'
 }
 
-# Load your data
-uc_data = pd.read_excel('UC_all.xlsx')
 
-original_data = uc_data.copy()
+@tracked_cache('shared_dataset', st.cache_resource(max_entries=2, show_spinner=False))
+def load_shared_dataset(version):
+    # Mapped once per process and version, then used by every session (the pages are shared between replicas)
+    with timed_section(startup_profile, 'open_dataset'):
+        return open_dataset(version)
 
-relationship_data = pd.read_excel('CE_in_MsC.xlsx')
 
-# Initialize uc_data in session state if it doesn't exist
-if 'uc_data' not in st.session_state:
-    st.session_state.uc_data = uc_data
+@tracked_cache('excel_dataset', st.cache_resource(max_entries=2, show_spinner=False))
+def load_excel_dataset(signatures):
+    # Parsed once per process and version of the Excel files (from their Parquet copies when they are up to date)
+    with timed_section(startup_profile, 'read_excel'):
+        uc_data = read_excel_cached('UC_all.xlsx')
+        relationship_data = read_excel_cached('CE_in_MsC.xlsx')
 
-# Ensure CODDISCIPLINACOD is treated as a string to avoid commas in the display
-st.session_state.uc_data['CODDISCIPLINACOD'] = uc_data['CODDISCIPLINACOD'].astype(str)
+    # Datasets built before row fingerprints were stored get them computed once here
+    if FINGERPRINT_COLUMN not in uc_data.columns:
+        uc_data = add_fingerprints(uc_data)
 
-# Streamlit app layout
-st.title("University Curriculum Data Dashboard")
+    # Ensure CODDISCIPLINACOD is treated as a string to avoid commas in the display
+    uc_data['CODDISCIPLINACOD'] = uc_data['CODDISCIPLINACOD'].astype(str)
 
-# Create tabs for navigation
-tab1, tab2, tab3, tab4 = st.tabs(["General Overview", "Department Overview", "Discipline Overview", "Upload Data"])
+    return uc_data, relationship_data
 
-# General Overview Tab
-with tab1:
-    st.header("General Overview of University Curriculum")
 
-    # Total statistics for MsC, CE, and Microcredentials
-    unique_msc_count = st.session_state.uc_data['MSC'].nunique()
-    unique_msc_disciplines = st.session_state.uc_data[st.session_state.uc_data['MSC'].notna()]['CODDISCIPLINACOD'].nunique()
+# Load your data from the fastest source: the published Arrow dataset if there is one, otherwise the Excel files
+dataset_version = current_dataset_version()
+dataset = load_shared_dataset(dataset_version) if dataset_version else None
+
+if dataset is not None:
+    uc_data = dataset['uc_data']
+    relationship_data = dataset['ce_in_msc']
+    data_source = dataset_version
+else:
+    data_source = (file_signature('UC_all.xlsx'), file_signature('CE_in_MsC.xlsx'))
+    uc_data, relationship_data = load_excel_dataset(data_source)
+
+@tracked_cache('course_catalogue', st.cache_resource(max_entries=4, show_spinner=False))
+def load_catalogue(data_key, _uc_data):
+    # Programmes of every discipline, built once per version of the data
+    return build_catalogue(_uc_data)
+
 
-    unique_ce_count = st.session_state.uc_data['CE'].nunique()
-    unique_ce_disciplines = st.session_state.uc_data[st.session_state.uc_data['CE'].notna()]['CODDISCIPLINACOD'].nunique()
+@tracked_cache('dpuc_topics', st.cache_resource(max_entries=1, show_spinner=False))
+def load_dpuc_topics(signature):
+    # Searchable DPUC texts, read once per version of the DPUC workbook
+    return load_topic_texts()
 
-    unique_micro_count = st.session_state.uc_data['Microcredencial'].nunique()
 
-    # Display program counts and disciplines
+@tracked_cache('snapshot_diff', st.cache_data(max_entries=8, show_spinner=False))
+def compare_snapshots(old_snapshot_id, new_snapshot_id):
+    # Snapshots are immutable, so every pair of versions is only loaded and compared once
+    return diff_snapshots(load_snapshot(old_snapshot_id), load_snapshot(new_snapshot_id))
+
+
+# Only the columns are needed to validate uploaded files
+original_columns = set(uc_data.columns)
+
+# Initialize uc_data in session state, and switch open sessions to a newly published version (unless they uploaded a file)
+if 'uc_data' not in st.session_state or (not st.session_state.get('uploaded_data', False) and st.session_state.get('data_source') != data_source):
+    st.session_state.uc_data = uc_data
+    st.session_state.data_source = data_source
+
+# Ensure CODDISCIPLINACOD is treated as a string to avoid commas in the display (only uploaded files still need it)
+if not pd.api.types.is_string_dtype(st.session_state.uc_data['CODDISCIPLINACOD']):
+    st.session_state.uc_data['CODDISCIPLINACOD'] = st.session_state.uc_data['CODDISCIPLINACOD'].astype(str)
+
+# The lookups stored with the shared dataset only apply while it has not been replaced by an uploaded file
+use_dataset_lookups = dataset is not None and st.session_state.uc_data is uc_data
+
+record_phase(startup_profile, 'load_data')
+
+# Create tabs for navigation (the diagnostics tab is only shown to admins, see profiling.py)
+show_diagnostics = diagnostics_allowed(st.query_params.get('diagnostics'))
+tab_names = ["General Overview", "Department Overview", "Discipline Overview", "Shared Disciplines", "Course Planner", "Compare Versions", "Upload Data"]
+tabs = st.tabs(tab_names + ["Diagnostics"] if show_diagnostics else tab_names)
+overview_tab, department_tab, discipline_tab, shared_tab, planner_tab, versions_tab, upload_tab = tabs[:len(tab_names)]
+
+# General Overview Tab
+with overview_tab:
+    st.header("General Overview of University Curriculum")
+
+    # Display program counts and disciplines of every programme type
     st.write(f"### Total Programs and Disciplines Across University")
-    st.write(f"- **{unique_msc_count}** Master programs (MsC) with **{unique_msc_disciplines}** disciplines.")
-    st.write(f"- **{unique_ce_count}** Especialization programs (CE) with **{unique_ce_disciplines}** disciplines.")
-    st.write(f"- **{unique_micro_count}** Microcredentials (μC).")
+    for label, column in PROGRAM_TYPES.items():
+        type_rows = st.session_state.uc_data[st.session_state.uc_data[column].notna()]
+        summary = f"- **{type_rows[column].nunique()}** {PROGRAM_TYPE_NAMES[label]}"
+        # Microcredentials are listed without their discipline count
+        if label != 'μC':
+            summary += f" with **{type_rows['CODDISCIPLINACOD'].nunique()}** disciplines"
+        st.write(f"{summary}.")
 
-    # Overlapping disciplines between MsC, CE, and Microcredentials
-    msc_disciplines = set(st.session_state.uc_data[st.session_state.uc_data['MSC'].notna()]['CODDISCIPLINACOD'].unique())
-    ce_disciplines = set(st.session_state.uc_data[st.session_state.uc_data['CE'].notna()]['CODDISCIPLINACOD'].unique())
-    micro_disciplines = set(st.session_state.uc_data[st.session_state.uc_data['Microcredencial'].notna()]['CODDISCIPLINACOD'].unique())
+    # Overlapping disciplines between the programme types (one membership bitmask per discipline)
+    overview_regions = compute_overlaps(st.session_state.uc_data)
 
     col1, col2, col3 = st.columns([1, 3, 1])
     
-    with col2:
-        sets = [msc_disciplines, ce_disciplines, micro_disciplines]
-        labels = ['MsC' if len(msc_disciplines) > 0 else '',
-                  'CE' if len(ce_disciplines) > 0 else '',
-                  'μC' if len(micro_disciplines) > 0 else '']
-        fig, ax = plt.subplots(figsize=(6, 6))  # Keep a reasonable size for Venn diagram
-        # Add title to the Venn diagram
-        ax.set_title('Disciplines of UA', fontsize=16)
-        venn = venn3(subsets=sets, set_labels=labels)
-
-        if venn.get_label_by_id('100'):
-            venn.get_label_by_id('100').set_text(f'{len(msc_disciplines - ce_disciplines - micro_disciplines)}')
-        if venn.get_label_by_id('010'):
-            venn.get_label_by_id('010').set_text(f'{len(ce_disciplines - msc_disciplines - micro_disciplines)}')
-        if venn.get_label_by_id('001'):
-            venn.get_label_by_id('001').set_text(f'{len(micro_disciplines - msc_disciplines - ce_disciplines)}')
-        if venn.get_label_by_id('110'):
-            venn.get_label_by_id('110').set_text(f'{len(msc_disciplines & ce_disciplines - micro_disciplines)}')
-        if venn.get_label_by_id('011'):
-            venn.get_label_by_id('011').set_text(f'{len(ce_disciplines & micro_disciplines - msc_disciplines)}')
-        if venn.get_label_by_id('101'):
-            venn.get_label_by_id('101').set_text(f'{len(msc_disciplines & micro_disciplines - ce_disciplines)}')
-        if venn.get_label_by_id('111'):
-            venn.get_label_by_id('111').set_text(f'{len(msc_disciplines & ce_disciplines & micro_disciplines)}')
-
-        # Set colors for the circles in the Venn diagram based on region IDs
-        venn_colors = {
-            '100': color_palette['MsC'],                # MSC only
-            '010': color_palette['CE'],                 # CE only
-            '001': color_palette['μC'],                 # μC only
-        }
-
-        # Apply colors to patches, but only if the patch (region) exists
-        region_labels = ['100', '010', '001']  # Corresponding region IDs
-
-        for region_id in region_labels:
-            patch = venn.get_patch_by_id(region_id)
-            if patch is not None:  # Only apply color if the region exists
-                patch.set_facecolor(venn_colors[region_id])
-                patch.set_alpha(1)  # Adjust transparency
-                patch.set_antialiased(True)
-                
-        st.pyplot(fig)
-
-    # Interpret the Venn diagram and explain the overlaps
+    with col2, timed_section(startup_profile, 'overlap_chart'):
+        draw_overlap_chart(overview_regions, 'Disciplines of UA')
+
+    # Interpret the overlap chart and explain the overlaps
     st.subheader("Interpretation of Discipline Overlaps")
-    
-    overlapping_msc_ce = len(msc_disciplines & ce_disciplines - micro_disciplines)
-    overlapping_ce_micro = len(ce_disciplines & micro_disciplines - msc_disciplines)
-    overlapping_msc_micro = len(msc_disciplines & micro_disciplines - ce_disciplines)
-    overlapping_all_three = len(msc_disciplines & ce_disciplines & micro_disciplines)
-
-    # Generate the explanation text dynamically
-    explanation_text = f"""
-    - **{len(msc_disciplines - ce_disciplines - micro_disciplines)}** disciplines are exclusive to **Master programs (MsC)**.
-    - **{len(ce_disciplines - msc_disciplines - micro_disciplines)}** disciplines are exclusive to **Especialization programs (CE)**.
-    - **{len(micro_disciplines - msc_disciplines - ce_disciplines)}** disciplines are exclusive to **Microcredentials (μC)**.
-    - **{overlapping_msc_ce}** disciplines overlap between **MsC and CE** but **NOT** with **μC**.
-    - **{overlapping_ce_micro}** disciplines overlap between **CE and μC** but **NOT** with **MsC**.
-    - **{overlapping_msc_micro}** disciplines overlap between **MsC and μC** but **NOT** with **CE**.
-    - **{overlapping_all_three}** disciplines are common across **MsC, CE, and μC**.
-    """
+
+    # Generate the explanation text dynamically (one line per region, including the empty ones)
+    explanation_text = "\n".join(
+        region_sentence(mask, count) for mask, count in zip(overview_regions['MASK'], overview_regions['COUNT']) if mask > 0
+    )
     st.write(explanation_text)
     
     #st.dataframe(relationship_data)
@@ -172,14 +285,23 @@ with tab1:
             statement = f"**MsC** (**{msc_code}** - {details['name']}) is associated with {ce_descriptions}."
             st.write(statement if ce_descriptions else f"**MsC** (**{msc_code}** - {details['name']}) has no associated CE programs.")
 
+record_phase(startup_profile, 'general_overview')
+
 # Department Overview Tab
-with tab2:
+with department_tab:
     st.header("Department Overview")
 
     # Interactivity: Filter by department
     department_filter = st.selectbox("Select a Department:", st.session_state.uc_data['DEPARTMENT'].unique())
 
-    filtered_data = st.session_state.uc_data[st.session_state.uc_data['DEPARTMENT'] == department_filter].drop_duplicates()
+    # Take the department rows from the precomputed positions when available instead of scanning every row
+    if use_dataset_lookups:
+        department_data = uc_data.take(dataset['department_rows'][department_filter])
+    else:
+        department_data = st.session_state.uc_data[st.session_state.uc_data['DEPARTMENT'] == department_filter]
+
+    # Deduplicate on the stored row fingerprint instead of comparing every column
+    filtered_data = department_data.drop_duplicates(subset=FINGERPRINT_COLUMN)
 
     if len(filtered_data) > 0:
         # Display the data
@@ -188,83 +310,64 @@ with tab2:
         # Drop the DEPARTMENT column from the filtered data
         filtered_display_data = filtered_data.drop(columns=['DEPARTMENT'])
 
-        # Drop the Url column from the filtered data
-        filtered_display_data = filtered_display_data.drop(columns=['Url'])
+        # Drop the Url and fingerprint columns from the filtered data
+        filtered_display_data = filtered_display_data.drop(columns=['Url', FINGERPRINT_COLUMN])
 
         # Sort the DataFrame by the CODDISCIPLINA column
         filtered_display_data = filtered_display_data.sort_values(by='CODDISCIPLINACOD')
 
-        st.dataframe(filtered_display_data, use_container_width=True, hide_index=True)
+        with timed_section(startup_profile, 'st_dataframe'):
+            st.dataframe(filtered_display_data, use_container_width=True, hide_index=True)
+
+        # Overlap regions of the department's disciplines, from one membership bitmask per discipline
+        department_regions = compute_overlaps(filtered_data)
 
-        # Count unique courses for each category
-        msc_courses = set(filtered_data['MSC'].dropna().unique())  # Unique MsC courses
-        ce_courses = set(filtered_data['CE'].dropna().unique())  # Unique CE courses
-        micro_courses = set(filtered_data['Microcredencial'].dropna().unique())  # Unique Microcredentials
-        
-        msc_courses_count = len(msc_courses)  # Count unique MsC courses
-        ce_courses_count = len(ce_courses)  # Count unique CE courses
-        micro_courses_count = len(micro_courses)  # Count unique Microcredentials
-        
         # Count unique disciplines for each category
-        msc_disciplines = set(filtered_data[filtered_data['MSC'].notna()]['CODDISCIPLINACOD'].unique())
-        ce_disciplines = set(filtered_data[filtered_data['CE'].notna()]['CODDISCIPLINACOD'].unique())
-        micro_disciplines = set(filtered_data[filtered_data['Microcredencial'].notna()]['CODDISCIPLINACOD'].unique())
+        discipline_counts = type_counts(department_regions)
 
-        msc_disciplines_count = len(msc_disciplines)
-        ce_disciplines_count = len(ce_disciplines)
-        micro_disciplines_count = len(micro_disciplines)
+        # Name and URL of every discipline of the department
+        first_rows = filtered_data.drop_duplicates(subset='CODDISCIPLINACOD').set_index('CODDISCIPLINACOD')
 
         # Display department-specific counts with formatted text
         st.write(f"### Summary of Programs in {department_filter}:")
         
-        # List all Master Programs in an expander
-        if msc_courses_count > 0:
-            st.write(f"- **{msc_courses_count}** Master programs (MsC) with **{msc_disciplines_count}** disciplines.")
-            with st.expander("List of MsC Programs"):
-                for program in msc_courses:
+        # List the programmes of every type in an expander
+        for label, column in PROGRAM_TYPES.items():
+            programs = filtered_data[column].dropna().unique()
+            if len(programs) == 0:
+                continue
+            summary = f"- **{len(programs)}** {PROGRAM_TYPE_NAMES[label]}"
+            # Microcredentials are listed without their discipline count
+            if label != 'μC':
+                summary += f" with **{discipline_counts[label]}** disciplines"
+            st.write(f"{summary}.")
+            with st.expander(f"List of {label} Programs"):
+                for program in programs:
                     parts = program.split('_')
                     program_code = parts[0].strip()  # Remove any extra spaces
                     program_name = parts[1].strip().upper()  # Uppercase for uniformity
-                    
-                    # Check if the program has any branches and gather them
-                    program_branches = filtered_data[filtered_data['MSC'] == program]['RAMO'].dropna().unique()
-                    
+
+                    # Check if the program has any branches (only MsC programmes have them) and gather them
+                    program_branches = filtered_data[filtered_data[column] == program]['RAMO'].dropna().unique()
+
                     # If branches exist, format them with enumeration
                     if program_branches.size > 0:
                         branches_str = ', '.join([branch.replace('_', ' ').strip().upper() for branch in program_branches])
                         st.write(f"**{program_code}** {program_name} (**Branches**: {branches_str})")  # Display program code and name with branches
                     else:
                         st.write(f"**{program_code}** {program_name}")  # No branches
-        
-        # List all CE programs in an expander
-        if ce_courses_count > 0:
-            st.write(f"- **{ce_courses_count}** Especialization programs (CE) with **{ce_disciplines_count}** disciplines.")
-            with st.expander("List of CE Programs"):
-                for program in ce_courses:
-                    parts = program.split('_')
-                    program_code = parts[0]
-                    program_name = parts[1].upper()
-                    st.write(f"**{program_code}** {program_name}")
-
-        # List all Microcredential programs in an expander
-        if micro_courses_count > 0:
-            st.write(f"- **{micro_courses_count}** Microcredentials (μC).")
-            with st.expander("List of μC Programs"):
-                for program in micro_courses:
-                    parts = program.split('_')
-                    program_code = parts[0].strip()
-                    program_name = parts[1].strip().upper()
-                    st.write(f"**{program_code}** {program_name}")
 
         # Create a bar chart for unique disciplines
         chart_data = pd.DataFrame({
-            "Category": ["MsC", "CE", "μC"],
-            "Discipline Count": [msc_disciplines_count, ce_disciplines_count, micro_disciplines_count]
+            "Category": list(discipline_counts),
+            "Discipline Count": list(discipline_counts.values())
         })
 
         # Create a 2-column layout for the bar chart and pie chart
         col1, col2 = st.columns([1, 0.6])
 
+        px = load_plotly_express()
+
         # Bar chart for unique disciplines (on the left)
         with col1:
             fig = px.bar(
@@ -282,17 +385,10 @@ with tab2:
 
         # Pie chart for discipline distribution (on the right)
         with col2:
-            pie_chart_data = {
-                'MsC': msc_disciplines_count,
-                'CE': ce_disciplines_count,
-                'μC': micro_disciplines_count
-            }
+            pie_chart_data = discipline_counts
+
             # Define the color palette explicitly for each category
-            color_discrete_map = {
-                'MsC': color_palette['MsC'],
-                'CE': color_palette['CE'],
-                'μC': color_palette['μC']
-            }
+            color_discrete_map = {label: color_palette[label] for label in pie_chart_data if label in color_palette}
 
             # Use a pie chart but include all categories, even with zero values
             pie_fig = px.pie(
@@ -307,219 +403,82 @@ with tab2:
 
             st.plotly_chart(pie_fig)
 
-        # Prepare data for Venn diagram
-        sets = [msc_disciplines, ce_disciplines, micro_disciplines]
-        labels = ['MsC' if len(msc_disciplines) > 0 else '',
-                  'CE' if len(ce_disciplines) > 0 else '',
-                  'μC' if len(micro_disciplines) > 0 else '']
-
-        # Initialize overlapping variables
-        overlapping_msc_only = set()
-        overlapping_ce_only = set()
-        overlapping_micro_only = set()
-        overlapping_msc_ce = set()
-        overlapping_ce_micro = set()
-        overlapping_msc_micro = set()
-        overlapping_all = set()
-
-        # Create a Venn diagram only if there is at least one non-empty set
-        if any(len(discipline) > 0 for discipline in sets):
-            fig, ax = plt.subplots(figsize=(6, 6))
-            # Add title to the Venn diagram
-            ax.set_title(f'Overlap of Disciplines in {department_filter}', fontsize=16)
-            venn = venn3(subsets=sets, set_labels=labels)
-
-            # Calculate overlapping disciplines
-            overlapping_msc_only = msc_disciplines - ce_disciplines - micro_disciplines
-            overlapping_ce_only = ce_disciplines - msc_disciplines - micro_disciplines
-            overlapping_micro_only = micro_disciplines - msc_disciplines - ce_disciplines
-            overlapping_msc_ce = msc_disciplines & ce_disciplines - micro_disciplines
-            overlapping_ce_micro = ce_disciplines & micro_disciplines - msc_disciplines
-            overlapping_msc_micro = msc_disciplines & micro_disciplines - ce_disciplines
-            overlapping_all = msc_disciplines & ce_disciplines & micro_disciplines
-
-            # Limit the width of the container to reduce the visual size of the Venn diagram
+        # Create the overlap chart only if at least one discipline belongs to a programme
+        if department_regions.loc[department_regions['MASK'] > 0, 'COUNT'].sum() > 0:
+            # Limit the width of the container to reduce the visual size of the overlap chart
             col1, col2, col3 = st.columns([1, 2, 1])  # Create columns with different width ratios
 
-            with col2:
-                if venn.get_label_by_id('100'):
-                    venn.get_label_by_id('100').set_text(f'{len(overlapping_msc_only)}')
-                if venn.get_label_by_id('010'):
-                    venn.get_label_by_id('010').set_text(f'{len(overlapping_ce_only)}')
-                if venn.get_label_by_id('001'):
-                    venn.get_label_by_id('001').set_text(f'{len(overlapping_micro_only)}')
-                if venn.get_label_by_id('110'):
-                    venn.get_label_by_id('110').set_text(f'{len(overlapping_msc_ce)}')
-                if venn.get_label_by_id('011'):
-                    venn.get_label_by_id('011').set_text(f'{len(overlapping_ce_micro)}')
-                if venn.get_label_by_id('101'):
-                    venn.get_label_by_id('101').set_text(f'{len(overlapping_msc_micro)}')
-                if venn.get_label_by_id('111'):
-                    venn.get_label_by_id('111').set_text(f'{len(overlapping_all)}')
-
-                # Set colors for the circles in the Venn diagram based on region IDs
-                venn_colors = {
-                    '100': color_palette['MsC'],                # MSC only
-                    '010': color_palette['CE'],                 # CE only
-                    '001': color_palette['μC'],                 # μC only
-                }
-
-                # Apply colors to patches, but only if the patch (region) exists
-                region_labels = ['100', '010', '001']  # Corresponding region IDs
+            with col2, timed_section(startup_profile, 'overlap_chart'):
+                draw_overlap_chart(department_regions, f'Overlap of Disciplines in {department_filter}')
 
-                for region_id in region_labels:
-                    patch = venn.get_patch_by_id(region_id)
-                    if patch is not None:  # Only apply color if the region exists
-                        patch.set_facecolor(venn_colors[region_id])
-                        patch.set_alpha(1)  # Adjust transparency
-                        patch.set_antialiased(True)
+            # Display the explanation of every non-empty region, with the list of its disciplines
+            for mask, count, disciplines in zip(department_regions['MASK'], department_regions['COUNT'], department_regions['DISCIPLINES']):
+                if mask == 0 or count == 0:
+                    continue
+                st.markdown(region_explanation(mask, count))  # Display the explanation
 
-                st.pyplot(fig)
-
-            # Create a mapping of disciplines to their respective programs (MsC, CE, Microcredentials)
-            discipline_to_program = {
-                discipline: {
-                    'MsC': filtered_data[filtered_data['CODDISCIPLINACOD'] == discipline]['MSC'].dropna().unique().tolist(),
-                    'CE': filtered_data[filtered_data['CODDISCIPLINACOD'] == discipline]['CE'].dropna().unique().tolist(),
-                    'μC': filtered_data[filtered_data['CODDISCIPLINACOD'] == discipline]['Microcredencial'].dropna().unique().tolist(),
-                }
-                for discipline in set(filtered_data['CODDISCIPLINACOD'])
-            }
-
-            # Initialize a list to hold explanations and their corresponding disciplines
-            explanations_with_disciplines = []
-
-            # Prepare explanations with counts and empty lists for disciplines
-            if len(overlapping_msc_only) > 0:
-                explanations_with_disciplines.append(
-                    (f"- **MsC Only**: **{len(overlapping_msc_only)}** disciplines exclusive to **Master programs (MsC)**.", overlapping_msc_only)
-                )
-            if len(overlapping_ce_only) > 0:
-                explanations_with_disciplines.append(
-                    (f"- **CE Only**: **{len(overlapping_ce_only)}** disciplines exclusive to **Especialization programs (CE)**.", overlapping_ce_only)
-                )
-            if len(overlapping_micro_only) > 0:
-                explanations_with_disciplines.append(
-                    (f"- **μC Only**: **{len(overlapping_micro_only)}** disciplines exclusive to **Microcredentials (μC)**.", overlapping_micro_only)
-                )
-            if len(overlapping_msc_ce) > 0:
-                explanations_with_disciplines.append(
-                    (f"- **MsC and CE Only**: **{len(overlapping_msc_ce)}** disciplines shared between **MsC** and **CE** programs, but **NOT** with **μC**.", overlapping_msc_ce)
-                )
-            if len(overlapping_ce_micro) > 0:
-                explanations_with_disciplines.append(
-                    (f"- **CE and μC Only**: **{len(overlapping_ce_micro)}** disciplines shared between **CE** programs and **μC**, but **NOT** with **MsC** programs.", overlapping_ce_micro)
-                )
-            if len(overlapping_msc_micro) > 0:
-                explanations_with_disciplines.append(
-                    (f"- **MsC and μC Only**: **{len(overlapping_msc_micro)}** disciplines shared between **MsC** and **μC**, but **NOT** with **CE** programs.", overlapping_msc_micro)
-                )
-            if len(overlapping_all) > 0:
-                explanations_with_disciplines.append(
-                    (f"- **MsC, CE and μC**: **{len(overlapping_all)}** disciplines common across **MsC, CE and μC**.", overlapping_all)
-                )
-
-            # Display the explanation and lists directly after each count
-            for explanation, disciplines in explanations_with_disciplines:
-                st.markdown(explanation)  # Display the explanation
-                
                 # Create an expander for the overlapping disciplines
                 with st.expander("Discipline List"):
                     # List the overlapping disciplines
                     for discipline in disciplines:
                         # Get the discipline name and URL from the DataFrame
-                        discipline_row = filtered_data[filtered_data['CODDISCIPLINACOD'] == discipline].iloc[0]
+                        discipline_row = first_rows.loc[discipline]
                         discipline_name = discipline_row['NOMEDISCIPLINA']
                         url = discipline_row['Url']
 
                         # Display discipline code and name as a clickable link that opens in a new tab
-                        st.markdown(f"**{discipline}**: <a href='{url}' target='_blank'>**{discipline_name}**</a>", unsafe_allow_html=True)
-
+                        st.markdown(f"**{discipline}**: {discipline_link(url, f'**{discipline_name}**')}", unsafe_allow_html=True)
 
-            # Create a mapping of disciplines to their respective programs (MsC, CE, Microcredentials)
-            discipline_to_program = {
-                discipline: {
-                    'MsC': filtered_data[filtered_data['CODDISCIPLINACOD'] == discipline]['MSC'].dropna().unique().tolist(),
-                    'CE': filtered_data[filtered_data['CODDISCIPLINACOD'] == discipline]['CE'].dropna().unique().tolist(),
-                    'μC': filtered_data[filtered_data['CODDISCIPLINACOD'] == discipline]['Microcredencial'].dropna().unique().tolist(),
+            # Create a mapping of disciplines to their respective programs (one list per programme type)
+            with timed_section(startup_profile, 'discipline_to_program'):
+                discipline_to_program = {
+                    discipline: {label: rows[column].dropna().unique().tolist() for label, column in PROGRAM_TYPES.items()}
+                    for discipline, rows in filtered_data.groupby('CODDISCIPLINACOD')
                 }
-                for discipline in set(filtered_data['CODDISCIPLINACOD'])
-            }
 
             # Helper function to add each overlapping discipline along with expanders for the programs
             def add_overlap(discipline):
                 # Get the discipline name and URL
-                discipline_data = filtered_data[filtered_data['CODDISCIPLINACOD'] == discipline]
-                discipline_name = discipline_data['NOMEDISCIPLINA'].values[0]
-                discipline_url = discipline_data['Url'].values[0]  # Assume there's a URL column in your filtered_data
+                discipline_name = first_rows.loc[discipline, 'NOMEDISCIPLINA']
+                discipline_url = first_rows.loc[discipline, 'Url']
 
                 # Display the discipline code and name as a hyperlink
-                st.markdown(f"**{discipline}: <a href='{discipline_url}' target='_blank'>{discipline_name}</a>**", unsafe_allow_html=True)
-                
+                st.markdown(f"**{discipline}: {discipline_link(discipline_url, discipline_name)}**", unsafe_allow_html=True)
+
                 # Get the programs related to the discipline
                 programs = discipline_to_program.get(discipline, {})
-                
-                # Expander for MsC Programs
-                if programs['MsC']:
-                    with st.expander(f"MsC Programs:"):
-                        for program in programs['MsC']:
-                            # Extract the master program name from the MSC column
-                            master_program = filtered_data[filtered_data['MSC'] == program]['MSC'].values[0]
-                            parts = master_program.split('_')
-                            program_code = parts[0]
-                            program_name = parts[1].upper()
-                            st.write(f"- **{program_code} -** {program_name}")
-                
-                # Expander for Microcredentials
-                if programs['μC']:
-                    with st.expander(f"μC Programs:"):
-                        for program in programs['μC']:
-                            micro_program = filtered_data[filtered_data['Microcredencial'] == program]['Microcredencial'].values[0]
-                            parts = micro_program.split('_')
-                            program_code = parts[0]
-                            program_name = parts[1].upper()
-                            st.write(f"- **{program_code} -** {program_name}")
-
-                # Expander for CE Programs
-                if programs['CE']:
-                    with st.expander(f"CE Programs:"):
-                        for program in programs['CE']:
-                            ce_program = filtered_data[filtered_data['CE'] == program]['CE'].values[0]
-                            parts = ce_program.split('_')
-                            program_code = parts[0]
-                            program_name = parts[1].upper()
-                            st.write(f"- **{program_code} -** {program_name}")
-
-            # Add overlapping disciplines and their corresponding programs
-            if overlapping_msc_ce:
-                st.write("#### Overlapping Disciplines between MsC and CE:")
-                for discipline in overlapping_msc_ce:
-                    add_overlap(discipline)
-
-            if overlapping_ce_micro:
-                st.write("#### Overlapping Disciplines between CE and μC:")
-                for discipline in overlapping_ce_micro:
-                    add_overlap(discipline)
-
-            if overlapping_msc_micro:
-                st.write("#### Overlapping Disciplines between MsC and μC:")
-                for discipline in overlapping_msc_micro:
-                    add_overlap(discipline)
-
-            if overlapping_all:
-                st.write("#### Overlapping Disciplines between MsC, CE, and μC:")
-                for discipline in overlapping_all:
-                    add_overlap(discipline)
+
+                # One expander per programme type the discipline belongs to
+                for label in PROGRAM_TYPES:
+                    if programs[label]:
+                        with st.expander(f"{label} Programs:"):
+                            for program in programs[label]:
+                                parts = program.split('_')
+                                program_code = parts[0]
+                                program_name = parts[1].upper()
+                                st.write(f"- **{program_code} -** {program_name}")
+
+            # Add overlapping disciplines (regions of two or more programme types) and their corresponding programs
+            for mask, region_disciplines in zip(department_regions['MASK'], department_regions['DISCIPLINES']):
+                if region_disciplines and len(region_types(mask, list(PROGRAM_TYPES))) > 1:
+                    st.write(f"#### Overlapping Disciplines between {join_types(region_types(mask, list(PROGRAM_TYPES)))}:")
+                    for discipline in region_disciplines:
+                        add_overlap(discipline)
 
     else:
         st.write("No data available for the selected department.")
 
+record_phase(startup_profile, 'department_overview')
+
 # Discipline Overview Tab
-with tab3:
+with discipline_tab:
     st.header("Discipline Overview")
 
     # Remove duplicates based on 'NOMEDISCIPLINA' and 'CODDISCIPLINACOD' columns to populate the selectbox
-    unique_disciplines = st.session_state.uc_data[['NOMEDISCIPLINA', 'CODDISCIPLINACOD']].drop_duplicates()
+    if use_dataset_lookups:
+        unique_disciplines = dataset['disciplines']
+    else:
+        unique_disciplines = st.session_state.uc_data[['NOMEDISCIPLINA', 'CODDISCIPLINACOD']].drop_duplicates()
 
     # Combine search and dropdown into one selectbox for unique disciplines
     discipline_selection = st.selectbox(
@@ -537,7 +496,7 @@ with tab3:
         url = selected_discipline_data['Url'].iloc[0]  # Get the URL for the selected discipline
             
         # Display discipline details (name and code) with a hyperlink
-        st.markdown(f"### Discipline: <a href='{url}' target='_blank'>**{discipline_name}**</a> ({discipline_code})", unsafe_allow_html=True)
+        st.markdown(f"### Discipline: {discipline_link(url, f'**{discipline_name}**')} ({discipline_code})", unsafe_allow_html=True)
 
         ### Handling the MSC, CE, and Microcredentials Program Display ###
 
@@ -608,20 +567,203 @@ with tab3:
 
                     st.write(f"- **{program_code} -** {program_name} **- {departments}**")
 
+record_phase(startup_profile, 'discipline_overview')
+
+# Shared Disciplines Tab
+with shared_tab:
+    st.header("Disciplines Shared Between Departments")
+
+    # Precomputed when the dataset is published, computed from the current data otherwise (e.g. after an upload)
+    if use_dataset_lookups:
+        department_pairs, department_shared_disciplines = dataset['department_pairs'], dataset['shared_disciplines']
+    else:
+        department_pairs, department_shared_disciplines = shared_discipline_tables(st.session_state.uc_data)
+
+    if len(department_pairs) == 0:
+        st.write("No department data available.")
+    else:
+        matrix = shared_matrix(department_pairs)
+
+        # Leave the diagonal (all the disciplines of a department) out so that it does not flatten the colour scale
+        heatmap_data = matrix.where(matrix.index.values[:, None] != matrix.columns.values[None, :])
+
+        px = load_plotly_express()
+        heatmap = px.imshow(
+            heatmap_data,
+            text_auto=True,
+            aspect='auto',
+            color_continuous_scale='Reds',
+            labels={'x': 'Department', 'y': 'Department', 'color': 'Shared Disciplines'},
+            title="Number of Disciplines Taught by Both Departments"
+        )
+        heatmap.update_layout(height=max(500, 30 * len(matrix)))
+        with timed_section(startup_profile, 'heatmap'):
+            st.plotly_chart(heatmap, use_container_width=True)
+
+        # Pairs of departments sharing the most disciplines
+        strongest_pairs = top_pairs(department_pairs)
+        if len(strongest_pairs) > 0:
+            with st.expander("Departments Sharing the Most Disciplines"):
+                st.dataframe(strongest_pairs.rename(columns={'DEPARTMENT_A': 'First Department', 'DEPARTMENT_B': 'Second Department', 'SHARED': 'Shared Disciplines'}), use_container_width=True, hide_index=True)
+
+        # Drill down into one pair of departments (the pair sharing the most disciplines by default)
+        departments = list(matrix.index)
+        default_pair = strongest_pairs.iloc[0] if len(strongest_pairs) > 0 else {'DEPARTMENT_A': departments[0], 'DEPARTMENT_B': departments[-1]}
+        col1, col2 = st.columns(2)
+        with col1:
+            department_a = st.selectbox("First department:", departments, index=departments.index(default_pair['DEPARTMENT_A']))
+        with col2:
+            department_b = st.selectbox("Second department:", departments, index=departments.index(default_pair['DEPARTMENT_B']))
+
+        if department_a == department_b:
+            st.write("Select two different departments to see the disciplines they share.")
+        else:
+            shared_codes = shared_disciplines(department_shared_disciplines, department_a, department_b)
+            st.write(f"### {len(shared_codes)} disciplines shared by {department_a} and {department_b}")
+
+            if shared_codes:
+                # Name and URL of the shared disciplines
+                shared_rows = st.session_state.uc_data[st.session_state.uc_data['CODDISCIPLINACOD'].isin(shared_codes)]
+                shared_rows = shared_rows.drop_duplicates(subset='CODDISCIPLINACOD').sort_values(by='CODDISCIPLINACOD')
+                with st.expander("Discipline List"):
+                    for discipline, discipline_name, url in zip(shared_rows['CODDISCIPLINACOD'], shared_rows['NOMEDISCIPLINA'], shared_rows['Url']):
+                        st.markdown(f"**{discipline}**: {discipline_link(url, f'**{discipline_name}**')}", unsafe_allow_html=True)
+
+record_phase(startup_profile, 'shared_disciplines')
+
+# Course Planner Tab
+with planner_tab:
+    st.header("Plan a New Course from Existing Disciplines")
+    st.write("Choose the disciplines (or DPUC topics) the new CE or μC should include to find the smallest set of existing programmes that already teach them, and the MsC programmes covering most of them.")
+
+    # The catalogue is keyed by the row fingerprints, so it is rebuilt only when the data changes (e.g. after an upload)
+    catalogue = load_catalogue(int(pd.util.hash_pandas_object(st.session_state.uc_data[FINGERPRINT_COLUMN], index=False).sum()), st.session_state.uc_data)
+    discipline_names = catalogue['names']
+
+    selected_codes = st.multiselect(
+        "Disciplines to include:",
+        sorted(discipline_names),
+        format_func=lambda code: f"{discipline_names[code]} ({code})"
+    )
+
+    # Disciplines whose DPUC title, objectives or contents mention the topics
+    topic_codes = []
+    if os.path.exists(DPUC_FILE):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            topics_text = st.text_input("DPUC topics to include (comma separated):")
+        with col2:
+            match_all_topics = st.checkbox("Every topic must match", value=False)
+        topics = [topic.strip() for topic in topics_text.split(',') if topic.strip()]
+        if topics:
+            topic_codes = [code for code in topic_disciplines(topics, load_dpuc_topics(file_signature(DPUC_FILE)), match_all_topics) if code in discipline_names]
+            st.write(f"**{len(topic_codes)}** disciplines mention the topics.")
+
+    allowed_types = st.multiselect("Programme types that can be reused:", list(PROGRAM_TYPES), default=list(PROGRAM_TYPES))
+
+    target_codes = sorted(set(selected_codes) | set(topic_codes))
+    if not target_codes:
+        st.write("Select at least one discipline or topic.")
+    elif not allowed_types:
+        st.write("Select at least one programme type.")
+    else:
+        with timed_section(startup_profile, 'plan_cover'):
+            plan = plan_cover(catalogue, target_codes, allowed_types)
+        covered_count = len(plan['target']) - len(plan['uncoverable'])
+
+        st.write(f"### {len(plan['programmes'])} programmes cover {covered_count} of the {len(plan['target'])} disciplines")
+        st.write(f"{'This is the smallest possible set' if plan['optimal'] else 'Best set found (not proven to be the smallest)'}, computed in {plan['seconds']}s.")
+
+        for programme in plan['programmes']:
+            parts = programme['programme'].split('_')
+            st.markdown(f"- **{programme['type']} {parts[0]}** - {parts[1].upper() if len(parts) > 1 else ''}: adds **{len(programme['new'])}** disciplines (covers {len(programme['covers'])} of its {programme['size']})")
+            with st.expander("Discipline List"):
+                for code in programme['new']:
+                    st.write(f"**{code}**: {discipline_names[code]}")
+
+        if plan['uncoverable']:
+            st.write(f"**{len(plan['uncoverable'])}** disciplines are not taught by any programme of the selected types:")
+            with st.expander("Uncovered Disciplines"):
+                for code in plan['uncoverable']:
+                    st.write(f"**{code}**: {discipline_names.get(code, '')}")
+
+        # Single MsC programmes covering most of the target
+        if 'MsC' in PROGRAM_TYPES:
+            best_msc = best_covering_programmes(catalogue, target_codes, 'MsC')
+            if best_msc:
+                st.write("### Best Covering MsC Programmes")
+                st.dataframe(pd.DataFrame({
+                    'MsC': [programme['programme'] for programme in best_msc],
+                    'Covered': [len(programme['covered']) for programme in best_msc],
+                    'Missing': [len(programme['missing']) for programme in best_msc],
+                    'Disciplines in MsC': [programme['size'] for programme in best_msc]
+                }), use_container_width=True, hide_index=True)
+
+record_phase(startup_profile, 'course_planner')
+
+# Compare Versions Tab
+with versions_tab:
+    st.header("Compare Dataset Versions")
+
+    # List the stored snapshots, most recent first
+    snapshot_index = list(reversed(load_snapshot_index()))
+
+    if len(snapshot_index) < 2:
+        st.write("At least two snapshots are needed for a comparison. A new snapshot is stored every time `main.py` runs.")
+    else:
+        snapshot_labels = {entry['id']: f"{entry['label']} - {entry['created']} ({entry['id']})" for entry in snapshot_index}
+
+        col1, col2 = st.columns(2)
+        with col1:
+            old_snapshot_id = st.selectbox("Base version:", list(snapshot_labels), index=1, format_func=snapshot_labels.get)
+        with col2:
+            new_snapshot_id = st.selectbox("Compared version:", list(snapshot_labels), index=0, format_func=snapshot_labels.get)
+
+        if old_snapshot_id == new_snapshot_id:
+            st.write("Select two different versions to see what changed.")
+        else:
+            changes = compare_snapshots(old_snapshot_id, new_snapshot_id)
+
+            st.write(f"### Changes from {snapshot_labels[old_snapshot_id]} to {snapshot_labels[new_snapshot_id]}")
+            st.write(f"- **{changes['unchanged_rows']}** rows unchanged, **{changes['added_rows']}** rows added and **{changes['removed_rows']}** rows removed.")
+            st.write(f"- **{len(changes['added_disciplines'])}** disciplines added and **{len(changes['removed_disciplines'])}** disciplines removed.")
+            st.write(f"- **{len(changes['membership_changes'])}** programme membership changes.")
+            st.write(f"- **{len(changes['url_changes'])}** DPUC URL changes.")
+
+            if len(changes['added_disciplines']) > 0:
+                with st.expander("Added Disciplines"):
+                    st.dataframe(changes['added_disciplines'], use_container_width=True, hide_index=True)
+            if len(changes['removed_disciplines']) > 0:
+                with st.expander("Removed Disciplines"):
+                    st.dataframe(changes['removed_disciplines'], use_container_width=True, hide_index=True)
+            if len(changes['membership_changes']) > 0:
+                with st.expander("Programme Membership Changes"):
+                    st.dataframe(changes['membership_changes'], use_container_width=True, hide_index=True)
+            if len(changes['url_changes']) > 0:
+                with st.expander("URL Changes"):
+                    st.dataframe(changes['url_changes'], use_container_width=True, hide_index=True)
+
+record_phase(startup_profile, 'compare_versions')
+
 # Upload Data Tab
-with tab4:
+with upload_tab:
     st.header("Upload Excel Files to Update Data")
     uploaded_file = st.file_uploader("Choose an Excel file", type=['xlsx'], accept_multiple_files=False)
 
     if st.button("Update Data"):
         if uploaded_file:
-            # Read the uploaded Excel file into uc_data
-            uc_data = pd.read_excel(uploaded_file)
+            # Read the uploaded Excel file (uc_data stays the shared dataset, which the session memory leaves out)
+            uploaded_uc_data = pd.read_excel(uploaded_file)
+
+            # Files exported before row fingerprints were stored get them computed here
+            if FINGERPRINT_COLUMN not in uploaded_uc_data.columns:
+                uploaded_uc_data = add_fingerprints(uploaded_uc_data)
 
-            # Check if uc_data has the same columns as original data
-            if set(uc_data.columns) == set(original_data.columns):
+            # Check if the uploaded data has the same columns as original data
+            if set(uploaded_uc_data.columns) == original_columns:
                 # Save the new uc_data to session state
-                st.session_state.uc_data = uc_data
+                st.session_state.uc_data = uploaded_uc_data
+                st.session_state.uploaded_data = True
                 st.success(f"Data from {uploaded_file.name} has been loaded successfully.")
             else:
                 st.error(f"The uploaded file {uploaded_file.name} does not have the correct columns.")
@@ -630,4 +772,40 @@ with tab4:
 
     # Display the current uc_data if it exists
     if st.session_state.uc_data is not None:
-        st.dataframe(st.session_state.uc_data, use_container_width=True, hide_index=True)
+        with timed_section(startup_profile, 'st_dataframe'):
+            st.dataframe(st.session_state.uc_data.drop(columns=[FINGERPRINT_COLUMN]), use_container_width=True, hide_index=True)
+
+record_phase(startup_profile, 'upload_data')
+
+# Report where the time of this run went (the first run of a process includes the deferred imports)
+if profiling_enabled():
+    run_profile = profile_summary(startup_profile)
+    print(f"Dashboard run profile: {run_profile}")
+    with st.sidebar.expander("Startup Profile"):
+        st.json(run_profile)
+
+# Add this run to the rolling statistics of the process, with the memory held by this session (not the shared dataset)
+if startup_profile['enabled']:
+    if 'diagnostics_session' not in st.session_state:
+        st.session_state.diagnostics_session = uuid.uuid4().hex[:8]
+    record_run(startup_profile, st.session_state.diagnostics_session, session_memory(st.session_state.to_dict().values(), shared=[uc_data, relationship_data]))
+
+# Diagnostics Tab
+if show_diagnostics:
+    with tabs[-1]:
+        st.header("Dashboard Diagnostics")
+        report = diagnostics_report()
+        st.write(f"Statistics of this dashboard process over the last {ROLLING_WINDOW} runs of every session (peak memory: **{report['peak_memory_mb']} MB**).")
+
+        st.write("### Run Time (seconds)")
+        st.write("`total` is the whole run, `phase/...` the time until the end of each tab and `section/...` the named hot paths.")
+        st.dataframe(pd.DataFrame.from_dict(report['timings'], orient='index'), use_container_width=True)
+
+        st.write("### Cache Hit Rates")
+        st.dataframe(pd.DataFrame.from_dict(report['caches'], orient='index'), use_container_width=True)
+
+        st.write("### Memory per Session")
+        st.write("Data held by every open session besides the shared dataset (e.g. uploaded files).")
+        st.dataframe(pd.DataFrame.from_dict(report['sessions'], orient='index'), use_container_width=True)
+
+        st.download_button("Download Diagnostics (JSON)", json.dumps(report, indent=2), file_name='diagnostics.json', mime='application/json')
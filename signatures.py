@@ -0,0 +1,19 @@
+import os
+
+
+def file_signature(file_path):
+    """Identify a version of a file without reading it: its absolute path, size and modification time."""
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+
+def path_signature(path):
+    # Signature of a file, or of every file below a folder in a stable order (missing paths have none)
+    if os.path.isfile(path):
+        return [list(file_signature(path))]
+    signature = []
+    for folder, subfolders, filenames in os.walk(path):
+        subfolders.sort()
+        for filename in sorted(filenames):
+            signature.append(list(file_signature(os.path.join(folder, filename))))
+    return signature
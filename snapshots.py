@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from deduplication import DATASET_COLUMNS, FINGERPRINT_COLUMN, row_fingerprints
+from overlap_engine import PROGRAM_TYPES
+
+# Folder holding the immutable snapshots and the index describing them
+SNAPSHOT_FOLDER = 'snapshots'
+SNAPSHOT_INDEX = 'index.json'
+
+# Columns stored in every snapshot (same as UC_all.xlsx)
+SNAPSHOT_COLUMNS = DATASET_COLUMNS
+
+# Programme columns compared when looking for membership changes (column -> programme type)
+PROGRAM_COLUMNS = {column: label for label, column in PROGRAM_TYPES.items()}
+
+
+def current_academic_year(today=None):
+    """Return the academic year label (e.g. '2024/2025') for the given date."""
+    today = today or datetime.now()
+    # The academic year starts in September
+    start_year = today.year if today.month >= 9 else today.year - 1
+    return f"{start_year}/{start_year + 1}"
+
+
+def load_snapshot_index(folder=SNAPSHOT_FOLDER):
+    # Return the list of known snapshots (oldest first), or an empty list if none exist
+    index_path = os.path.join(folder, SNAPSHOT_INDEX)
+    if not os.path.exists(index_path):
+        return []
+    with open(index_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_snapshot(uc_data, label=None, folder=SNAPSHOT_FOLDER):
+    """Store the UC data as an immutable, content-addressed Parquet snapshot and return its id."""
+    os.makedirs(folder, exist_ok=True)
+
+    # Keep only the dataset columns and attach the per-row hashes (reusing the fingerprints computed at ingest)
+    snapshot = uc_data[SNAPSHOT_COLUMNS].copy()
+    if FINGERPRINT_COLUMN in uc_data.columns:
+        snapshot['ROWHASH'] = uc_data[FINGERPRINT_COLUMN]
+    else:
+        snapshot['ROWHASH'] = row_fingerprints(snapshot, SNAPSHOT_COLUMNS)
+
+    # Sort by hash so that the same content always produces the same file, whatever the loading order
+    snapshot = snapshot.sort_values(by='ROWHASH', kind='stable').reset_index(drop=True)
+
+    # The snapshot id is derived from the row hashes only
+    snapshot_id = hashlib.sha256('\n'.join(snapshot['ROWHASH']).encode('utf-8')).hexdigest()[:16]
+    snapshot_path = os.path.join(folder, f"{snapshot_id}.parquet")
+
+    # Snapshots are never overwritten: identical content is already stored under the same id
+    if not os.path.exists(snapshot_path):
+        tmp_path = f"{snapshot_path}.tmp"
+        snapshot.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, snapshot_path)
+        print(f"Snapshot saved to '{snapshot_path}'")
+    else:
+        print(f"Snapshot '{snapshot_id}' already exists, nothing to store")
+
+    # Register the snapshot in the index (once per id)
+    index = load_snapshot_index(folder)
+    if not any(entry['id'] == snapshot_id for entry in index):
+        index.append({
+            'id': snapshot_id,
+            'label': label or current_academic_year(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'rows': len(snapshot),
+            'disciplines': int(snapshot['CODDISCIPLINACOD'].nunique())
+        })
+        index_path = os.path.join(folder, SNAPSHOT_INDEX)
+        with open(f"{index_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        os.replace(f"{index_path}.tmp", index_path)
+
+    return snapshot_id
+
+
+def load_snapshot(snapshot_id, folder=SNAPSHOT_FOLDER):
+    # Load a stored snapshot, with the discipline codes as strings so that snapshots compare cleanly
+    snapshot = pd.read_parquet(os.path.join(folder, f"{snapshot_id}.parquet"))
+    snapshot['CODDISCIPLINACOD'] = snapshot['CODDISCIPLINACOD'].astype(str)
+    return snapshot
+
+
+def _membership(snapshot):
+    # Build the (discipline, programme type, programme) pairs of a snapshot
+    pairs = []
+    for column, program_type in PROGRAM_COLUMNS.items():
+        rows = snapshot.loc[snapshot[column].notna(), ['CODDISCIPLINACOD', column]]
+        rows = rows.rename(columns={column: 'PROGRAMME'})
+        rows['TYPE'] = program_type
+        pairs.append(rows)
+    return pd.concat(pairs, ignore_index=True).drop_duplicates()
+
+
+def diff_snapshots(old, new):
+    """Compare two snapshots and return a dictionary of DataFrames describing the changes."""
+    # Rows whose hash exists on both sides are unchanged and can be skipped entirely
+    old_changed = old[~old['ROWHASH'].isin(new['ROWHASH'])]
+    new_changed = new[~new['ROWHASH'].isin(old['ROWHASH'])]
+
+    # Disciplines touched by at least one changed row
+    touched = set(old_changed['CODDISCIPLINACOD']) | set(new_changed['CODDISCIPLINACOD'])
+    old_touched = old[old['CODDISCIPLINACOD'].isin(touched)]
+    new_touched = new[new['CODDISCIPLINACOD'].isin(touched)]
+
+    # Discipline names, preferring the most recent one
+    names = pd.concat([new_touched, old_touched]).drop_duplicates(subset='CODDISCIPLINACOD').set_index('CODDISCIPLINACOD')['NOMEDISCIPLINA']
+
+    # Added and removed disciplines
+    old_codes = set(old_touched['CODDISCIPLINACOD'])
+    new_codes = set(new_touched['CODDISCIPLINACOD'])
+    added_disciplines = pd.DataFrame({'CODDISCIPLINACOD': sorted(new_codes - old_codes)})
+    removed_disciplines = pd.DataFrame({'CODDISCIPLINACOD': sorted(old_codes - new_codes)})
+    added_disciplines['NOMEDISCIPLINA'] = added_disciplines['CODDISCIPLINACOD'].map(names)
+    removed_disciplines['NOMEDISCIPLINA'] = removed_disciplines['CODDISCIPLINACOD'].map(names)
+
+    # Programme membership changes (hash join of the membership pairs)
+    membership = pd.merge(_membership(old_touched), _membership(new_touched),
+                          on=['CODDISCIPLINACOD', 'TYPE', 'PROGRAMME'], how='outer', indicator=True)
+    membership = membership[membership['_merge'] != 'both']
+    membership['CHANGE'] = membership['_merge'].map({'left_only': 'removed', 'right_only': 'added'}).astype(str)
+    membership['NOMEDISCIPLINA'] = membership['CODDISCIPLINACOD'].map(names)
+    membership = membership[['CODDISCIPLINACOD', 'NOMEDISCIPLINA', 'TYPE', 'PROGRAMME', 'CHANGE']]
+    membership = membership.sort_values(by=['CODDISCIPLINACOD', 'TYPE', 'PROGRAMME']).reset_index(drop=True)
+
+    # URL changes for disciplines present on both sides (a discipline can have several DPUC URLs, so their sets are compared)
+    common_codes = old_codes & new_codes
+    old_urls = old_touched.loc[old_touched['CODDISCIPLINACOD'].isin(common_codes) & old_touched['Url'].notna(), ['CODDISCIPLINACOD', 'Url']].drop_duplicates()
+    new_urls = new_touched.loc[new_touched['CODDISCIPLINACOD'].isin(common_codes) & new_touched['Url'].notna(), ['CODDISCIPLINACOD', 'Url']].drop_duplicates()
+    url_changes = pd.merge(old_urls, new_urls, on=['CODDISCIPLINACOD', 'Url'], how='outer', indicator=True)
+    url_changes = url_changes[url_changes['_merge'] != 'both']
+    url_changes['CHANGE'] = url_changes['_merge'].map({'left_only': 'removed', 'right_only': 'added'}).astype(str)
+    url_changes['NOMEDISCIPLINA'] = url_changes['CODDISCIPLINACOD'].map(names)
+    url_changes = url_changes[['CODDISCIPLINACOD', 'NOMEDISCIPLINA', 'Url', 'CHANGE']]
+    url_changes = url_changes.sort_values(by=['CODDISCIPLINACOD', 'CHANGE', 'Url']).reset_index(drop=True)
+
+    return {
+        'unchanged_rows': len(new) - len(new_changed),
+        'added_rows': len(new_changed),
+        'removed_rows': len(old_changed),
+        'added_disciplines': added_disciplines,
+        'removed_disciplines': removed_disciplines,
+        'membership_changes': membership,
+        'url_changes': url_changes
+    }
+
+
+if __name__ == "__main__":
+    # Snapshot the current UC_all.xlsx (useful to seed the history from an existing build)
+    snapshot_id = save_snapshot(pd.read_excel('UC_all.xlsx'))
+    print(f"Current dataset stored as snapshot '{snapshot_id}'")
@@ -0,0 +1,343 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from curriculum_index import build_curriculum_index, load_dataset
+from deduplication import DATASET_COLUMNS, FINGERPRINT_COLUMN
+from overlap_engine import PROGRAM_TYPE_NAMES, PROGRAM_TYPES, join_types, region_label, venn_region_id
+
+# Folder receiving the exported site
+SITE_FOLDER = 'site'
+MANIFEST_FILE = 'manifest.json'
+
+# Changing this forces every page to be rendered again (bump it when the templates change)
+TEMPLATE_VERSION = 2
+
+# Same colors as the dashboard (other programme types get the next color of the matplotlib cycle)
+COLOR_PALETTE = {
+    'MsC': '#FF4B4B',
+    'CE': '#4BFF6B',
+    'μC': '#4BB0FF'
+}
+
+# Columns of the department table (same as the dashboard, without DEPARTMENT and Url)
+TABLE_COLUMNS = [column for column in DATASET_COLUMNS if column not in ('DEPARTMENT', 'Url')]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title} - University Curriculum Data</title>
+<style>
+body {{ font-family: serif; margin: 2em auto; max-width: 1100px; padding: 0 1em; }}
+table {{ border-collapse: collapse; width: 100%; font-size: 0.9em; }}
+th, td {{ border: 1px solid #ddd; padding: 4px 6px; text-align: left; }}
+th {{ background: #f4f4f4; }}
+.charts img {{ max-width: 32%; }}
+details {{ margin: 0.3em 0 0.8em 1em; }}
+</style>
+</head>
+<body>
+<p><a href="{root}index.html">University Curriculum Data</a></p>
+{body}
+</body>
+</html>
+"""
+
+
+def page_slug(name):
+    # File name of a department or discipline page (department names may contain '/')
+    return re.sub(r'[^\w\-]', '_', name)
+
+
+def _link(url, text):
+    if not url:
+        return f"<b>{html.escape(text)}</b>"
+    return f"<a href='{html.escape(url)}' target='_blank'><b>{html.escape(text)}</b></a>"
+
+
+def _programme_label(programme):
+    return f"<b>{html.escape(programme['code'])}</b> {html.escape(programme['name'])}"
+
+
+def _page_hash(document):
+    # Hash of everything rendered on the page, used to skip pages whose data did not change
+    payload = json.dumps([TEMPLATE_VERSION, document], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# ------------------------------- Page documents ------------------------------- #
+
+def department_document(index, department, rows):
+    """Collect everything shown on a department page."""
+    entry = index['departments'][department]
+    rows = rows.sort_values(by='CODDISCIPLINACOD')
+    disciplines = index['disciplines']
+
+    programmes = {}
+    for program_type in PROGRAM_TYPES:
+        programmes[program_type] = []
+        for programme in entry['programmes'][program_type]:
+            programme_entry = dict(index['programmes'][programme])
+            programme_entry.pop('disciplines')
+            # Only the branches offered in this department
+            if program_type == 'MsC':
+                programme_entry['branches'] = sorted(rows.loc[rows['MSC'] == programme, 'RAMO'].dropna().unique().tolist())
+            programmes[program_type].append(programme_entry)
+
+    discipline_counts = {
+        program_type: int(rows.loc[rows[column].notna(), 'CODDISCIPLINACOD'].nunique())
+        for program_type, column in PROGRAM_TYPES.items()
+    }
+
+    # Disciplines of every overlap region, with the programmes they belong to in this department
+    department_programmes = {
+        program_type: rows[rows[column].notna()].groupby('CODDISCIPLINACOD')[column].agg(lambda x: sorted(x.unique().tolist()))
+        for program_type, column in PROGRAM_TYPES.items()
+    }
+    overlaps = {}
+    for region, codes in entry['overlaps'].items():
+        overlaps[region] = [{
+            'code': code,
+            'name': disciplines[code]['name'],
+            'url': disciplines[code]['url'],
+            'programmes': {
+                program_type: department_programmes[program_type].get(code, [])
+                for program_type in PROGRAM_TYPES
+            }
+        } for code in codes]
+
+    return {
+        'type': 'department',
+        'department': department,
+        'table': rows[TABLE_COLUMNS].astype(object).where(rows[TABLE_COLUMNS].notna(), None).values.tolist(),
+        'programmes': programmes,
+        'discipline_counts': discipline_counts,
+        'overlaps': overlaps
+    }
+
+
+def discipline_document(index, code):
+    """Collect everything shown on a discipline page."""
+    return dict(index['disciplines'][code], type='discipline')
+
+
+# ------------------------------- Charts ------------------------------- #
+
+def _render_department_charts(document, folder, slug):
+    # Bar chart, pie chart and Venn diagram of the department, saved as SVG next to the page
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib_venn import venn3
+
+    plt.rcParams['font.family'] = 'serif'
+    department = document['department']
+    counts = document['discipline_counts']
+    labels = list(PROGRAM_TYPES)
+    colors = [COLOR_PALETTE.get(label, f"C{bit}") for bit, label in enumerate(labels)]
+    charts = {}
+
+    fig, ax = plt.subplots(figsize=(5, 4))
+    bars = ax.bar(labels, [counts[label] for label in labels], color=colors)
+    ax.bar_label(bars)
+    ax.set_title(f"Disciplines by Category in {department}")
+    charts['bar'] = f"{slug}_bar.svg"
+    fig.savefig(os.path.join(folder, charts['bar']), bbox_inches='tight')
+    plt.close(fig)
+
+    if sum(counts.values()) > 0:
+        fig, ax = plt.subplots(figsize=(4, 4))
+        ax.pie([counts[label] for label in labels], labels=labels, colors=colors, autopct='%1.1f%%', wedgeprops={'width': 0.4})
+        ax.set_title(f"Discipline Distribution in {department}")
+        charts['pie'] = f"{slug}_pie.svg"
+        fig.savefig(os.path.join(folder, charts['pie']), bbox_inches='tight')
+        plt.close(fig)
+
+        # Region sizes in bitmask order, which is also the matplotlib_venn order (100, 010, 110, 001, 101, 011, 111)
+        subsets = [len(document['overlaps'].get(region_label(mask, labels), [])) for mask in range(1, 1 << len(labels))]
+        fig, ax = plt.subplots(figsize=(5, 5))
+        ax.set_title(f"Overlap of Disciplines in {department}")
+        if len(labels) == 3:
+            with warnings.catch_warnings():
+                # matplotlib_venn warns about empty circles, which are expected for many departments
+                warnings.simplefilter('ignore', UserWarning)
+                venn = venn3(subsets=subsets, set_labels=[label if counts[label] > 0 else '' for label in labels], ax=ax)
+            for bit, label in enumerate(labels):
+                patch = venn.get_patch_by_id(venn_region_id(1 << bit, labels))
+                if patch is not None:
+                    patch.set_facecolor(colors[bit])
+                    patch.set_alpha(1)
+        else:
+            # Venn diagrams do not scale past three sets: show the size of every non-empty region instead
+            regions = [(region_label(mask, labels), size) for mask, size in enumerate(subsets, start=1) if size > 0]
+            bars = ax.barh([region for region, _ in regions], [size for _, size in regions], color='#888888')
+            ax.bar_label(bars)
+            ax.invert_yaxis()
+        charts['venn'] = f"{slug}_venn.svg"
+        fig.savefig(os.path.join(folder, charts['venn']), bbox_inches='tight')
+        plt.close(fig)
+
+    return charts
+
+
+# ------------------------------- HTML ------------------------------- #
+
+def _department_html(document, charts):
+    department = html.escape(document['department'])
+    counts = document['discipline_counts']
+    parts = [f"<h1>UC's for Department: {department}</h1>"]
+
+    parts.append("<table><tr>" + ''.join(f"<th>{column}</th>" for column in TABLE_COLUMNS) + "</tr>")
+    for row in document['table']:
+        cells = [f"<a href='../disciplines/{html.escape(str(row[0]))}.html'>{html.escape(str(row[0]))}</a>"]
+        cells += [html.escape(str(value)) if value is not None else '' for value in row[1:]]
+        parts.append("<tr>" + ''.join(f"<td>{cell}</td>" for cell in cells) + "</tr>")
+    parts.append("</table>")
+
+    parts.append(f"<h2>Summary of Programs in {department}:</h2><ul>")
+    for program_type, programmes in document['programmes'].items():
+        if not programmes:
+            continue
+        summary = f"<b>{len(programmes)}</b> {PROGRAM_TYPE_NAMES[program_type]}"
+        if program_type != 'μC':
+            summary += f" with <b>{counts[program_type]}</b> disciplines"
+        items = []
+        for programme in programmes:
+            item = _programme_label(programme)
+            if programme.get('branches'):
+                branches = ', '.join(branch.replace('_', ' ').strip().upper() for branch in programme['branches'])
+                item += f" (<b>Branches</b>: {html.escape(branches)})"
+            items.append(f"<li>{item}</li>")
+        parts.append(f"<li>{summary}.<details><summary>List of {program_type} Programs</summary><ul>{''.join(items)}</ul></details></li>")
+    parts.append("</ul>")
+
+    if charts:
+        parts.append("<div class='charts'>" + ''.join(f"<img src='{html.escape(chart)}' alt='{name} chart'>" for name, chart in charts.items()) + "</div>")
+
+    for region, disciplines in document['overlaps'].items():
+        region_types = region.split('+')
+        if len(region_types) == 1:
+            text = f"<b>{region} Only</b>: <b>{len(disciplines)}</b> disciplines exclusive to <b>{PROGRAM_TYPE_NAMES[region]}</b>."
+        else:
+            text = f"<b>{join_types(region_types)}</b>: <b>{len(disciplines)}</b> disciplines shared only between <b>{join_types(region_types)}</b>."
+        items = []
+        for discipline in disciplines:
+            item = f"<a href='../disciplines/{html.escape(discipline['code'])}.html'>{html.escape(discipline['code'])}</a>: {_link(discipline['url'], discipline['name'] or '')}"
+            if len(region_types) > 1:
+                programmes = [f"{program_type}: {html.escape(', '.join(names))}" for program_type, names in discipline['programmes'].items() if names]
+                item += f" <small>({'; '.join(programmes)})</small>"
+            items.append(f"<li>{item}</li>")
+        parts.append(f"<p>{text}</p><details><summary>Discipline List</summary><ul>{''.join(items)}</ul></details>")
+
+    return PAGE_TEMPLATE.format(title=department, root='../', body='\n'.join(parts))
+
+
+def _discipline_html(document):
+    parts = [f"<h1>Discipline: {_link(document['url'], document['name'] or '')} ({html.escape(document['code'])})</h1>"]
+    for program_type, programmes in document['programmes'].items():
+        if not programmes:
+            continue
+        items = []
+        for programme in programmes:
+            departments = '/'.join(f"<a href='../departments/{html.escape(page_slug(department))}.html'>{html.escape(department)}</a>" for department in programme['departments'])
+            item = f"{_programme_label(programme)} <b>- {departments}</b>"
+            if programme.get('branches'):
+                branches = ' - '.join(f"[{branch.replace('_', ' ').upper()}]" for branch in programme['branches'])
+                item += f"<br><b>{len(programme['branches'])} Ramos:</b> {html.escape(branches)}"
+            items.append(f"<li>{item}</li>")
+        parts.append(f"<h2>{len(programmes)} {PROGRAM_TYPE_NAMES[program_type]}</h2><ul>{''.join(items)}</ul>")
+    return PAGE_TEMPLATE.format(title=html.escape(document['name'] or document['code']), root='../', body='\n'.join(parts))
+
+
+def render_page(site_folder, page, document):
+    """Write the HTML and JSON files (and charts) of one page. Runs in a worker process."""
+    folder = os.path.join(site_folder, os.path.dirname(page))
+    os.makedirs(folder, exist_ok=True)
+
+    if document['type'] == 'department':
+        charts = _render_department_charts(document, folder, os.path.basename(page))
+        page_html = _department_html(document, charts)
+    else:
+        page_html = _discipline_html(document)
+
+    with open(os.path.join(site_folder, f"{page}.json"), 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False)
+    with open(os.path.join(site_folder, f"{page}.html"), 'w', encoding='utf-8') as f:
+        f.write(page_html)
+    return page
+
+
+def _index_html(index):
+    departments = ''.join(f"<li><a href='departments/{html.escape(page_slug(department))}.html'>{html.escape(department)}</a></li>" for department in sorted(index['departments']))
+    disciplines = ''.join(f"<li><a href='disciplines/{html.escape(code)}.html'>{html.escape(code)}</a> {html.escape(discipline['name'] or '')}</li>"
+                          for code, discipline in index['disciplines'].items())
+    body = f"<h1>University Curriculum Data</h1><h2>Departments</h2><ul>{departments}</ul><h2>Disciplines</h2><ul>{disciplines}</ul>"
+    return PAGE_TEMPLATE.format(title='Overview', root='', body=body)
+
+
+def export_site(uc_data, ce_in_msc, site_folder=SITE_FOLDER, workers=None, force=False):
+    """Render every department and discipline page, skipping pages whose data did not change since the last export."""
+    uc_data = uc_data.drop_duplicates(subset=FINGERPRINT_COLUMN)
+    index = build_curriculum_index(uc_data, ce_in_msc)
+    os.makedirs(site_folder, exist_ok=True)
+
+    # Build the documents of all pages
+    documents = {}
+    for department, rows in uc_data.groupby('DEPARTMENT'):
+        documents[f"departments/{page_slug(department)}"] = department_document(index, department, rows)
+    for code in index['disciplines']:
+        documents[f"disciplines/{code}"] = discipline_document(index, code)
+
+    # Compare the page hashes with the previous export
+    manifest_path = os.path.join(site_folder, MANIFEST_FILE)
+    previous = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path, encoding='utf-8') as f:
+            previous = json.load(f)
+    hashes = {page: _page_hash(document) for page, document in documents.items()}
+    # Pages whose files were deleted from the site are rendered again even if their data did not change
+    changed = [page for page, page_hash in hashes.items() if previous.get(page) != page_hash or not os.path.exists(os.path.join(site_folder, f"{page}.html"))]
+
+    # Render the changed pages in parallel
+    if changed:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(render_page, [site_folder] * len(changed), changed, [documents[page] for page in changed], chunksize=32))
+
+    # Remove the pages that no longer exist
+    removed = [page for page in previous if page not in documents]
+    for page in removed:
+        for suffix in ['.html', '.json', '_bar.svg', '_pie.svg', '_venn.svg']:
+            path = os.path.join(site_folder, f"{page}{suffix}")
+            if os.path.exists(path):
+                os.remove(path)
+
+    with open(os.path.join(site_folder, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(_index_html(index))
+    with open(os.path.join(site_folder, 'ce_in_msc.json'), 'w', encoding='utf-8') as f:
+        json.dump(index['ce_in_msc'], f, ensure_ascii=False)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f, indent=0)
+
+    return {'pages': len(documents), 'rendered': len(changed), 'removed': len(removed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the department and discipline pages as a static site.")
+    parser.add_argument('--output', default=SITE_FOLDER, help="folder receiving the site")
+    parser.add_argument('--workers', type=int, help="number of rendering processes (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="render every page, even unchanged ones")
+    args = parser.parse_args()
+
+    uc_data, ce_in_msc = load_dataset()
+    summary = export_site(uc_data, ce_in_msc, args.output, args.workers, args.force)
+    print(f"Static site exported to '{args.output}': {summary['rendered']} of {summary['pages']} pages rendered, {summary['removed']} removed")
+
+
+if __name__ == "__main__":
+    main()
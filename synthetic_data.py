@@ -0,0 +1,178 @@
+import os
+import random
+import sys
+
+import pandas as pd
+
+# Columns of the curricular plan exports (PlanoCurso_*.xlsx)
+PLAN_COLUMNS = [
+    'CODDISCIPLINACOD', 'NOMEDISCIPLINA', 'NOMEDISCIPLINAING', 'ANOCURRICULAR', 'SEMESTRE', 'SIGLA_PERIODOAULA',
+    'PERIODOAULA', 'ECTS', 'ECTS_1SEM', 'ECTS_2SEM', 'CODESTADOATUAL', 'ESTADOATUAL', 'TEORICAS', 'TEORICOPRATICAS',
+    'PRATICAS', 'OT', 'TRABALHOCAMPO', 'SEMINARIO', 'ESTAGIO', 'PRATICALABORATORIAL', 'OUTRA', 'SIGLAPERIODO',
+    'SIGLAAREA', 'NOMEAREA', 'NOMEAREAING', 'CODDISCIPLINACODGENERICA', 'NOMEDISCIPLINAGENERICA',
+    'NOMEDISCIPLINAINGGENERICA', 'DESCTIPO', 'NOTAMINIMA', 'NUMDISCIPLINASASSOCIADAS'
+]
+
+# Departments (folder names under data/MSC)
+DEPARTMENTS = [
+    'dao', 'dbio', 'dcivil', 'dcm', 'dcspt', 'deca', 'degeit', 'dem', 'demac', 'dep', 'deti',
+    'dfis', 'dgeo', 'dlc', 'dmat', 'dq', 'esan', 'essua', 'estga', 'isca'
+]
+
+# Sizes of the real dataset, multiplied by the scale factor
+BASE_SIZES = {
+    'disciplines': 3500,
+    'msc_plans': 100,
+    'ce_plans': 35,
+    'microcredentials': 216
+}
+
+# Average number of disciplines in a plan (does not change with the scale)
+PLAN_SIZE = 30
+
+# Words used to build discipline and programme names
+NAME_WORDS = [
+    'ANÁLISE', 'SISTEMAS', 'GESTÃO', 'ENGENHARIA', 'DADOS', 'MATERIAIS', 'COMUNICAÇÃO', 'ESTATÍSTICA',
+    'QUÍMICA', 'BIOLOGIA', 'DESIGN', 'ENERGIA', 'AMBIENTE', 'SAÚDE', 'EDUCAÇÃO', 'MARKETING', 'FINANÇAS',
+    'ROBÓTICA', 'REDES', 'SEGURANÇA', 'MODELAÇÃO', 'PROJETO', 'INOVAÇÃO', 'LINGUAGEM', 'TECNOLOGIA'
+]
+NAME_QUALIFIERS = ['I', 'II', 'III', 'AVANÇADA', 'APLICADA', 'COMPUTACIONAL', 'INTEGRADA', 'EXPERIMENTAL']
+
+
+def _name(rng, words=2):
+    return ' '.join(rng.sample(NAME_WORDS, words))
+
+
+def _plan_row(rng, code, name, area):
+    # One discipline row of a curricular plan export
+    semester = rng.choice([1, 2])
+    generic = 'OPÇÃO LIVRE' if rng.random() < 0.03 else None
+    return [
+        code, name, name, rng.choice([1, 2]), f"{semester}º Semestre", f"{semester}S",
+        semester, 6, 6 if semester == 1 else 0, 6 if semester == 2 else 0, 1, 'ACTIVO',
+        rng.choice([0, 1.5, 2]), rng.choice([0, 1, 3]), rng.choice([0, 1, 2]), rng.choice([0, 1]),
+        0, 0, 0, 0, 0, 'Sem.', area[:4].upper(), area.title(), area.title(), 0, generic, generic, None, 0, 0
+    ]
+
+
+def _plan_rows(rng, catalogue, all_codes, department_codes, size):
+    # Pick most disciplines from the department and some from the whole catalogue
+    local = rng.sample(department_codes, min(len(department_codes), int(size * 0.8)))
+    shared = rng.sample(all_codes, size - len(local))
+    return [_plan_row(rng, code, catalogue[code][0], catalogue[code][1]) for code in local + shared]
+
+
+def _write_plan(file_path, rows):
+    pd.DataFrame(rows, columns=PLAN_COLUMNS).to_excel(file_path, index=False)
+
+
+def _write_branch_plan(file_path, branches):
+    # Plans with branches have, for every branch, a "Ramo - name" (or "Percurso n") line,
+    # a header line and the discipline rows, as expected by msc_branch_processing.py
+    rows = []
+    for branch_title, branch_rows in branches:
+        rows.append([branch_title] + [None] * (len(PLAN_COLUMNS) - 1))
+        rows.append(PLAN_COLUMNS)
+        rows.extend(branch_rows)
+    pd.DataFrame(rows).to_excel(file_path, index=False, header=False)
+
+
+def generate_curriculum_data(output_folder, scale=1, seed=0):
+    """Write a synthetic data/ tree, microcredentials and DPUC workbook of the given scale into output_folder."""
+    rng = random.Random(seed)
+    sizes = {key: max(1, int(value * scale)) for key, value in BASE_SIZES.items()}
+
+    # Discipline catalogue: code -> (name, area), grouped by department
+    catalogue = {}
+    department_codes = {department: [] for department in DEPARTMENTS}
+    for index in range(sizes['disciplines']):
+        code = 40000 + index
+        department = DEPARTMENTS[index % len(DEPARTMENTS)]
+        catalogue[code] = (f"{_name(rng)} {rng.choice(NAME_QUALIFIERS)} {index}", rng.choice(NAME_WORDS))
+        department_codes[department].append(code)
+    all_codes = list(catalogue)
+
+    # ------------------------------- MSC plans ------------------------------- #
+    msc_programmes = []
+    for index in range(sizes['msc_plans']):
+        department = DEPARTMENTS[index % len(DEPARTMENTS)]
+        department_path = os.path.join(output_folder, 'data', 'MSC', department)
+        os.makedirs(department_path, exist_ok=True)
+
+        programme = f"{9000 + index}_{_name(rng).title()} {index}"
+        file_path = os.path.join(department_path, f"PlanoCurso_{programme}.xlsx")
+        plan_size = rng.randint(PLAN_SIZE // 2, PLAN_SIZE * 3 // 2)
+
+        # About one plan in five has branches (Ramos), and some of those are Percursos
+        branch_roll = rng.random()
+        if branch_roll < 0.15:
+            branches = [(f"Ramo - {_name(rng, 1).title()} {branch}", _plan_rows(rng, catalogue, all_codes, department_codes[department], plan_size // 2))
+                        for branch in range(rng.randint(2, 4))]
+            _write_branch_plan(file_path, branches)
+        elif branch_roll < 0.2:
+            branches = [(f"Percurso {branch + 1}", _plan_rows(rng, catalogue, all_codes, department_codes[department], plan_size // 2))
+                        for branch in range(2)]
+            _write_branch_plan(file_path, branches)
+        else:
+            branches = [(None, _plan_rows(rng, catalogue, all_codes, department_codes[department], plan_size))]
+            _write_plan(file_path, branches[0][1])
+
+        msc_programmes.append([row[0] for _, branch_rows in branches for row in branch_rows])
+
+    # ------------------------------- CE plans ------------------------------- #
+    ce_folder = os.path.join(output_folder, 'data', 'CE')
+    os.makedirs(ce_folder, exist_ok=True)
+    for index in range(sizes['ce_plans']):
+        # Some CE are shared by several departments (DEPT1_DEPT2_PlanoCurso_code_name.xlsx)
+        departments = rng.sample(DEPARTMENTS, rng.choice([1, 1, 1, 2, 3]))
+        prefix = '_'.join(department.upper() for department in departments)
+        programme = f"{5000 + index}_{_name(rng).title()} {index}"
+        file_path = os.path.join(ce_folder, f"{prefix}_PlanoCurso_{programme}.xlsx")
+
+        # Half of the CE are made of disciplines of an existing MSC, the others mostly of disciplines of their departments
+        if rng.random() < 0.5:
+            msc_codes = rng.choice(msc_programmes)
+            codes = rng.sample(msc_codes, min(len(msc_codes), rng.randint(4, 8)))
+            _write_plan(file_path, [_plan_row(rng, code, catalogue[code][0], catalogue[code][1]) for code in codes])
+        else:
+            codes = [code for department in departments for code in department_codes[department]]
+            _write_plan(file_path, _plan_rows(rng, catalogue, all_codes, codes, rng.randint(4, 12)))
+
+    # ------------------------------- Microcredentials ------------------------------- #
+    microcredentials = []
+    for index in range(sizes['microcredentials']):
+        department = rng.choice(DEPARTMENTS)
+        name = f"{_name(rng)} {index}"
+        for code in rng.sample(department_codes[department], rng.choice([1, 1, 2])):
+            microcredentials.append([name, 6000 + index, code, department.upper()])
+    pd.DataFrame(microcredentials, columns=['Microcredencial', 'CODIGOMICROCREDENCIAL', 'CODDISCIPLINACOD', 'Department']).to_excel(
+        os.path.join(output_folder, 'data', 'Microcredenciais.xlsx'), index=False)
+
+    # ------------------------------- DPUC workbook ------------------------------- #
+    dpuc_rows = []
+    for code, (name, area) in catalogue.items():
+        # Most disciplines have a DPUC page, a few have two
+        if rng.random() < 0.85:
+            for _ in range(2 if rng.random() < 0.1 else 1):
+                objectives = ' '.join(rng.choice(NAME_WORDS).lower() for _ in range(80))
+                contents = '<br />'.join(f"{chapter}-{_name(rng).title()}" for chapter in range(1, 15))
+                dpuc_rows.append([code, f"https://www.ua.pt/en/uc/{10000 + len(dpuc_rows)}", name, f"<p>{objectives}</p>", f"<p>{contents}</p>"])
+    pd.DataFrame(dpuc_rows, columns=['CodigoPACO', 'Url', 'Title', 'Objectivos', 'Programa']).to_excel(
+        os.path.join(output_folder, 'DPUCs - contents + objectives.xlsx'), index=False)
+
+    return {
+        'disciplines': len(catalogue),
+        'msc_plans': len(msc_programmes),
+        'ce_plans': sizes['ce_plans'],
+        'microcredential_rows': len(microcredentials),
+        'dpuc_rows': len(dpuc_rows)
+    }
+
+
+if __name__ == "__main__":
+    # Usage: python3 synthetic_data.py <output folder> [scale] [seed]
+    output_folder = sys.argv[1] if len(sys.argv) > 1 else 'synthetic'
+    scale = float(sys.argv[2]) if len(sys.argv) > 2 else 1
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    summary = generate_curriculum_data(output_folder, scale, seed)
+    print(f"Synthetic data ({scale}x) written to '{output_folder}': {summary}")